@@ -1,6 +1,6 @@
 {
     'name': 'Website Category Sync',
-    'version': '18.0.1.0.5',
+    'version': '18.0.1.3.0',
     'category': 'Website',
     'summary': 'Synchronizes inventory product category hierarchy to website categories.',
     'author': 'GitHub Copilot',
@@ -11,6 +11,11 @@
     ],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
+        'data/ir_actions_server_data.xml',
+        'views/category_sync_job_views.xml',
+        'views/category_sync_run_views.xml',
+        'views/category_sync_plan_views.xml',
         'views/sync_views.xml',
         'views/product_tracking_wizard_views.xml',
     ],
@@ -0,0 +1,12 @@
+from odoo.addons.website_sale.controllers.main import WebsiteSale
+from odoo.osv import expression
+
+
+class WebsiteSaleCategorySync(WebsiteSale):
+
+    def _get_shop_domain(self, search, category, attrib_values, search_in_description=True, **kwargs):
+        # One indexed lookup in the denormalized ancestors table instead of a `child_of` over the category tree
+        domain = super()._get_shop_domain(search, None, attrib_values, search_in_description=search_in_description, **kwargs)
+        if category:
+            domain = expression.AND([domain, [('public_categ_ancestor_ids.public_categ_id', '=', int(category))]])
+        return domain
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    # Website categories created before inventory_mirror existed are the ones still linked
+    # to an inventory category.
+    cr.execute("""
+        UPDATE product_public_category
+           SET inventory_mirror = TRUE
+         WHERE inventory_category_id IS NOT NULL
+    """)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    # Merge the duplicate mirrors left by concurrent syncs before the unique index is created:
+    # the lowest id of each (inventory category, website) pair is kept.
+    cr.execute("""
+        CREATE TEMP TABLE wcs_duplicate_category ON COMMIT DROP AS
+        SELECT id, keep_id
+          FROM (SELECT id, MIN(id) OVER (PARTITION BY inventory_category_id, COALESCE(website_id, 0)) AS keep_id
+                  FROM product_public_category
+                 WHERE inventory_category_id IS NOT NULL) AS mirror
+         WHERE id != keep_id
+    """)
+    if not cr.rowcount:
+        return
+    duplicate_count = cr.rowcount
+
+    cr.execute("""
+        INSERT INTO product_public_category_product_template_rel (product_template_id, product_public_category_id)
+        SELECT rel.product_template_id, dup.keep_id
+          FROM product_public_category_product_template_rel rel
+          JOIN wcs_duplicate_category dup ON dup.id = rel.product_public_category_id
+            ON CONFLICT DO NOTHING
+    """)
+    cr.execute("""
+        UPDATE product_public_category category
+           SET parent_id = dup.keep_id
+          FROM wcs_duplicate_category dup
+         WHERE category.parent_id = dup.id
+    """)
+    reparented_count = cr.rowcount
+    cr.execute("DELETE FROM product_public_category WHERE id IN (SELECT id FROM wcs_duplicate_category)")
+
+    if reparented_count:
+        cr.execute("""
+            WITH RECURSIVE tree AS (
+                SELECT id, id || '/' AS path
+                  FROM product_public_category
+                 WHERE parent_id IS NULL
+                UNION ALL
+                SELECT child.id, tree.path || child.id || '/'
+                  FROM product_public_category child
+                  JOIN tree ON child.parent_id = tree.id
+            )
+            UPDATE product_public_category category
+               SET parent_path = tree.path
+              FROM tree
+             WHERE tree.id = category.id
+               AND category.parent_path IS DISTINCT FROM tree.path
+        """)
+    _logger.info("Merged %s duplicate mirrored website categories (%s children moved).", duplicate_count, reparented_count)
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    # The product count columns are new: fill them from the product ancestors table.
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['product.public.category']._update_product_counts()
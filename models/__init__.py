@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+from . import category_sync_run
 from . import category_sync
+from . import category_sync_job
+from . import category_sync_plan
+from . import category_sync_product_ancestor
 from . import product_tracking_wizard
+from . import product_category
+from . import product_template
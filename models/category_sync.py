@@ -1,9 +1,22 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, Command, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL, frozendict, ormcache
+import io
 import logging
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from .category_sync_run import SyncRunStats
 
 _logger = logging.getLogger(__name__)
 
+DEFAULT_DEBOUNCE_MINUTES = 5
+DEFAULT_PRODUCT_WORKERS = 1
+PRUNE_BATCH_SIZE = 1000
+SYNC_LOCK_KEY = zlib.crc32(b'website_category_sync')
+
 class ProductPublicCategory(models.Model):
     _inherit = 'product.public.category'
 
@@ -13,116 +26,1357 @@ class ProductPublicCategory(models.Model):
         index=True,
         help="The inventory category this website category was created from."
     )
+    inventory_mirror = fields.Boolean(
+        string='Mirrored from Inventory',
+        index=True,
+        copy=False,
+        help="Created by the synchronization. Kept when the source inventory category "
+             "is deleted, so the orphaned website category can be detected."
+    )
+    product_count_direct = fields.Integer(
+        string='Published Products', readonly=True, copy=False,
+        help="Published products assigned to this category."
+    )
+    product_count_total = fields.Integer(
+        string='Published Products (with Subcategories)', readonly=True, copy=False,
+        help="Published products in this category or any of its descendants."
+    )
+
+    def init(self):
+        super().init()
+        # One mirror per inventory category and website. COALESCE makes the shared tree
+        # (no website) unique as well, since NULLs never conflict in a unique index.
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS product_public_category_inventory_category_website_uniq
+                ON product_public_category (inventory_category_id, COALESCE(website_id, 0))
+             WHERE inventory_category_id IS NOT NULL
+        """)
+
+    @api.model
+    def _update_product_counts(self, category_ids=None):
+        """Store the product counts of `category_ids`, or of every category when
+        None, with one aggregate query on the product ancestors table."""
+        if category_ids is not None and not category_ids:
+            return
+        self.env['product.template'].flush_model(['is_published', 'active'])
+        if category_ids is None:
+            category_filter = ancestor_filter = SQL("TRUE")
+        else:
+            category_filter = SQL("target.id = ANY(%s)", list(category_ids))
+            ancestor_filter = SQL("ancestor.public_categ_id = ANY(%s)", list(category_ids))
+        self.env.cr.execute(SQL(
+            """
+            UPDATE product_public_category category
+               SET product_count_direct = COALESCE(counts.direct, 0),
+                   product_count_total = COALESCE(counts.total, 0)
+              FROM product_public_category target
+         LEFT JOIN (SELECT ancestor.public_categ_id,
+                           COUNT(*) FILTER (WHERE ancestor.depth = 0) AS direct,
+                           COUNT(*) AS total
+                      FROM %(ancestor_table)s ancestor
+                      JOIN product_template product ON product.id = ancestor.product_tmpl_id
+                     WHERE product.is_published AND product.active AND %(ancestor_filter)s
+                  GROUP BY ancestor.public_categ_id) AS counts ON counts.public_categ_id = target.id
+             WHERE category.id = target.id
+               AND %(category_filter)s
+               AND (category.product_count_direct, category.product_count_total)
+                   IS DISTINCT FROM (COALESCE(counts.direct, 0), COALESCE(counts.total, 0))
+            """,
+            ancestor_table=SQL.identifier(self.env['category.sync.product.ancestor']._table),
+            ancestor_filter=ancestor_filter,
+            category_filter=category_filter,
+        ))
+        self.invalidate_model(['product_count_direct', 'product_count_total'])
+
+    @api.model
+    @ormcache('website_id')
+    def _get_inventory_category_map(self, website_id=False):
+        """Process-wide ``{inv_cat_id: web_cat_id}`` of one website's mirror.
+
+        Cached per database and registry sequence, cleared whenever
+        `inventory_category_id` or `website_id` changes. Do not mutate the result.
+        """
+        rows = self.sudo().search_read([
+            ('inventory_category_id', '!=', False), ('website_id', '=', website_id),
+        ], ['inventory_category_id'], load=None)
+        return frozendict({row['inventory_category_id']: row['id'] for row in rows})
+
+    @api.model
+    @ormcache()
+    def _get_managed_category_ids(self):
+        """Cached IDs of every website category mirrored from an inventory category, on any website."""
+        return frozenset(self.sudo().search([('inventory_category_id', '!=', False)]).ids)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        categories = super().create(vals_list)
+        if any(vals.get('inventory_category_id') for vals in vals_list):
+            self.env.registry.clear_cache()
+        if any(vals.get('product_tmpl_ids') for vals in vals_list):
+            self.env['category.sync.product.ancestor']._refresh(
+                categories.with_context(active_test=False).product_tmpl_ids.ids
+            )
+        return categories
+
+    def write(self, vals):
+        # Products assigned from the category side, including the ones taken out of it
+        products = self.with_context(active_test=False).product_tmpl_ids if 'product_tmpl_ids' in vals else None
+        res = super().write(vals)
+        Ancestor = self.env['category.sync.product.ancestor']
+        if 'inventory_category_id' in vals or 'website_id' in vals:
+            self.env.registry.clear_cache()
+        if 'parent_id' in vals:
+            Ancestor._refresh_categories(self.ids)
+        if products is not None:
+            Ancestor._refresh((products | self.with_context(active_test=False).product_tmpl_ids).ids)
+        return res
+
+    def unlink(self):
+        mirrored = any(self.mapped('inventory_category_id'))
+        # Products below the deleted categories keep rows for their remaining ancestors
+        products = self.env['product.template'].with_context(active_test=False).search([('public_categ_ids', 'child_of', self.ids)])
+        res = super().unlink()
+        if mirrored:
+            self.env.registry.clear_cache()
+        self.env['category.sync.product.ancestor']._refresh(products.ids)
+        return res
+
+class Website(models.Model):
+    _inherit = 'website'
+
+    category_sync_mirror = fields.Boolean(
+        string='Mirror Inventory Categories',
+        help="Give this website its own copy of the inventory category tree. "
+             "When no website is selected, a single tree shared by all websites is kept."
+    )
+
+class CategorySyncQueue(models.Model):
+    _name = 'category.sync.queue'
+    _description = 'Pending incremental category synchronization'
+    _log_access = False
+
+    res_model = fields.Selection([
+        ('product.category', 'Inventory Category'),
+        ('product.template', 'Product Template'),
+    ], required=True)
+    res_id = fields.Integer(required=True, help="Plain integer so the entry survives the deletion of its record.")
+    subtree = fields.Boolean(help="Also re-sync the products of every descendant category.")
 
 class CategorySyncManager(models.AbstractModel):
     _name = 'category.sync.manager'
     _description = 'Manages synchronization of inventory categories to website categories'
 
     @api.model
-    def _find_or_create_website_category(self, inventory_category, website_category_map):
-        # Check cache first
-        if inventory_category.id in website_category_map:
-            return website_category_map[inventory_category.id]
+    def _acquire_sync_lock(self, raise_exception=True):
+        """Take the advisory lock that serializes sync runs across workers.
 
-        website_cat = self.env['product.public.category'].search([
-            ('inventory_category_id', '=', inventory_category.id)
-        ], limit=1)
+        The lock belongs to the current transaction and is released by its
+        commit or rollback. Taking it again in the same transaction is a no-op.
+        """
+        self.env.cr.execute(SQL("SELECT pg_try_advisory_xact_lock(%s)", SYNC_LOCK_KEY))
+        if self.env.cr.fetchone()[0]:
+            return True
+        if raise_exception:
+            raise UserError(_("Another category synchronization is running. Try again once it is finished."))
+        return False
 
-        if not website_cat:
-            website_cat_vals = {
-                'name': inventory_category.name,
-                'inventory_category_id': inventory_category.id,
-            }
-            website_cat = self.env['product.public.category'].create(website_cat_vals)
-            _logger.info(f"Created new website category '{website_cat.name}' (ID: {website_cat.id}) from inventory category '{inventory_category.name}' (ID: {inventory_category.id}).")
+    @api.model
+    def _read_inventory_categories(self, domain=None):
+        """Read the inventory tree in one query.
+
+        :return: ``{inv_cat_id: {'name': str, 'parent_id': inv_parent_id or False, 'write_date': datetime}}``
+        """
+        rows = self.env['product.category'].search_read(
+            domain or [], ['name', 'parent_id', 'write_date'], order='id', load=None,
+        )
+        return {row['id']: row for row in rows}
+
+    @api.model
+    def _get_target_website_ids(self):
+        """Websites that get their own mirror of the inventory tree, or ``[False]``
+        for a single mirror shared by all websites."""
+        return self.env['website'].sudo().search([('category_sync_mirror', '=', True)]).ids or [False]
+
+    @api.model
+    def get_website_category_maps(self):
+        """Which website category mirrors each inventory category, from the cache.
+
+        :return: ``{website_id: {inv_cat_id: web_cat_id}}`` for the target websites
+        """
+        PublicCategory = self.env['product.public.category']
+        return {
+            website_id: PublicCategory._get_inventory_category_map(website_id)
+            for website_id in self._get_target_website_ids()
+        }
+
+    @api.model
+    def _read_website_mappings(self, website_ids, inventory_ids=None):
+        """Read the mirrored website categories of several websites in one query.
+
+        :return: ``{website_id: {inv_cat_id: {'id', 'name', 'parent_id', 'inventory_category_id', 'website_id', 'write_date'}}}``
+        """
+        domain = [('inventory_category_id', '!=', False), ('website_id', 'in', list(website_ids))]
+        if inventory_ids is not None:
+            domain = [('inventory_category_id', 'in', list(inventory_ids)), ('website_id', 'in', list(website_ids))]
+        rows = self.env['product.public.category'].search_read(
+            domain, ['name', 'parent_id', 'inventory_category_id', 'website_id', 'write_date'], load=None,
+        )
+        mappings = {website_id: {} for website_id in website_ids}
+        for row in rows:
+            mappings[row['website_id'] or False][row['inventory_category_id']] = row
+        return mappings
+
+    @api.model
+    def _read_website_mapping(self, inventory_ids=None, website_id=False):
+        """Read the mirrored website categories of one website, keyed by inventory category.
+
+        :return: ``{inv_cat_id: {'id', 'name', 'parent_id', 'inventory_category_id', 'website_id'}}``
+        """
+        return self._read_website_mappings([website_id], inventory_ids)[website_id]
+
+    @api.model
+    def _diff_category_trees(self, inventory_rows, mapping):
+        """Compare the inventory tree with its website mirror in memory.
+
+        Parents are expressed as inventory category IDs so the diff can be
+        applied before the missing website categories exist. The reverse sync
+        uses the same engine with the roles of both trees swapped.
+
+        Conflicts are resolved by `write_date` when both rows carry it: a target
+        edited after its source keeps its name and parent.
+
+        :return: ``{'create': [inv_id], 'rename': {inv_id: name}, 'reparent': {inv_id: inv_parent_id or False}}``
+        """
+        web_to_inv = {row['id']: inv_id for inv_id, row in mapping.items()}
+        diff = {'create': [], 'rename': {}, 'reparent': {}}
+        for inv_id, inv_cat in inventory_rows.items():
+            target_parent = inv_cat['parent_id'] or False
+            website_cat = mapping.get(inv_id)
+            if not website_cat:
+                diff['create'].append(inv_id)
+                if target_parent:
+                    diff['reparent'][inv_id] = target_parent
+                continue
+            if website_cat.get('write_date') and inv_cat.get('write_date') and website_cat['write_date'] > inv_cat['write_date']:
+                continue # Newer edit on the target side, pushed the other way by the opposite sync
+            if website_cat['name'] != inv_cat['name']:
+                diff['rename'][inv_id] = inv_cat['name']
+            current_parent = web_to_inv.get(website_cat['parent_id']) if website_cat['parent_id'] else False
+            if current_parent != target_parent:
+                diff['reparent'][inv_id] = target_parent
+        return diff
+
+    @api.model
+    def _apply_category_diff(self, diff, inventory_rows, website_category_map, stats=None, website_id=False, full_tree=False, planned=False):
+        """Apply a diff from `_diff_category_trees` with batched writes.
+
+        Missing categories are created in one call, the names of every mirror
+        in `website_category_map` are synced in all languages with one
+        statement and reparents are grouped by target parent.
+        `website_category_map` is completed in place with the created categories.
+        `full_tree` tells that the whole inventory tree is being synced, `planned`
+        that the diff comes from a plan whose stored names must be applied as is.
+        """
+        PublicCategory = self.env['product.public.category']
+        stats = stats or SyncRunStats(self.env.cr)
+
+        with stats.phase('categories') as metrics:
+            metrics['rows_written'] += self._apply_category_creates_and_renames(diff, inventory_rows, website_category_map, website_id, planned)
+            PublicCategory.flush_model()
+
+        with stats.phase('parents') as metrics:
+            metrics['rows_written'] += self._apply_category_reparents(diff, website_category_map, full_tree)
+            PublicCategory.flush_model()
+
+    @api.model
+    def _apply_category_creates_and_renames(self, diff, inventory_rows, website_category_map, website_id=False, planned=False):
+        """:return: the number of created and renamed categories"""
+        created_ids = []
+        if diff['create']:
+            upserted, created_ids = self._upsert_website_categories(diff['create'], inventory_rows, website_id)
+            website_category_map.update(upserted)
+            _logger.info(f"Created {len(created_ids)} website categories from inventory categories, "
+                         f"{len(upserted) - len(created_ids)} were already created by a concurrent sync.")
+
+        if planned:
+            # The names computed when planning, not the live inventory names
+            names = {website_category_map[inv_id]: name for inv_id, name in diff['rename'].items() if inv_id in website_category_map}
+            names.update((website_category_map[inv_id], inventory_rows[inv_id]['name']) for inv_id in diff['create'])
+            renamed_count = self._write_category_names(names)
         else:
-            if website_cat.name != inventory_category.name: # Sync name if changed
-                website_cat.name = inventory_category.name
-                _logger.info(f"Updated name for website category '{website_cat.name}' from inventory category '{inventory_category.name}'.")
-        
-        website_category_map[inventory_category.id] = website_cat.id
-        return website_cat.id
+            # Also catches names that only differ in a language other than the current one.
+            renamed_count = self._sync_category_names(list(website_category_map.values()), created_ids)
+        return len(diff['create']) + renamed_count
 
     @api.model
-    def sync_categories_to_website(self):
-        _logger.info("Starting synchronization of inventory categories to website categories...")
-        
-        inventory_categories = self.env['product.category'].search([])
-        website_category_map = {} # Cache: {inv_cat_id: web_cat_id}
-
-        # First pass: Create/update all website categories and populate map
-        for inv_cat in inventory_categories:
-            self._find_or_create_website_category(inv_cat, website_category_map)
-
-        # Second pass: Set parents for website categories
-        for inv_cat in inventory_categories:
-            website_cat_id = website_category_map.get(inv_cat.id)
-            if not website_cat_id:
-                _logger.error(f"Consistency error: Inventory category '{inv_cat.name}' (ID: {inv_cat.id}) not found in map during parent assignment.")
+    def _upsert_website_categories(self, inventory_ids, inventory_rows, website_id=False):
+        """Create the mirrors of `inventory_ids` with one ``INSERT ... ON CONFLICT``.
+
+        Relies on the unique index on ``(inventory_category_id, website_id)``: a
+        mirror created meanwhile by a concurrent sync is returned instead of being
+        duplicated. New categories are roots; the parents phase places them.
+
+        :return: ``({inv_cat_id: web_cat_id}, created_ids)``
+        """
+        PublicCategory = self.env['product.public.category']
+        PublicCategory.flush_model()
+        # Append in inventory order, one step apart like the default sequence of single creates
+        first_sequence = PublicCategory.default_get(['sequence']).get('sequence') or 0
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO product_public_category
+                   (name, inventory_category_id, inventory_mirror, website_id, sequence,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT jsonb_build_object('en_US', v.name), v.inventory_category_id, TRUE, %(website_id)s, v.sequence,
+                   %(uid)s, (now() AT TIME ZONE 'UTC'), %(uid)s, (now() AT TIME ZONE 'UTC')
+              FROM unnest(%(inventory_ids)s::int[], %(names)s::varchar[], %(sequences)s::int[]) AS v(inventory_category_id, name, sequence)
+                ON CONFLICT (inventory_category_id, COALESCE(website_id, 0)) WHERE inventory_category_id IS NOT NULL
+                DO UPDATE SET inventory_mirror = TRUE
+         RETURNING inventory_category_id, id, xmax = 0
+            """,
+            website_id=website_id or None,
+            sequences=[first_sequence + 5 * index for index in range(len(inventory_ids))],
+            uid=self.env.uid,
+            inventory_ids=list(inventory_ids),
+            names=[inventory_rows[inv_id]['name'] for inv_id in inventory_ids],
+        ))
+        upserted = {}
+        created_ids = []
+        for inv_id, web_id, created in self.env.cr.fetchall():
+            upserted[inv_id] = web_id
+            if created:
+                created_ids.append(web_id)
+        if created_ids:
+            self.env.cr.execute(SQL(
+                "UPDATE product_public_category SET parent_path = id || '/' WHERE id = ANY(%s)", created_ids,
+            ))
+        # Raw SQL bypasses the ORM: drop its caches and the cached mappings.
+        PublicCategory.invalidate_model()
+        self.env.registry.clear_cache()
+        return upserted, created_ids
+
+    @api.model
+    def _inventory_name_targets(self, website_category_ids, created_ids=()):
+        """SQL selecting ``(id, name)``: the JSONB name each mirror gets from its
+        inventory category, in every language.
+
+        Mirrors edited after their inventory category are left out, except the
+        ones just created (`created_ids`). A non-translatable inventory name is
+        copied into every language.
+        """
+        Category = self.env['product.category']
+        self.env['product.public.category'].flush_model(['name', 'inventory_category_id', 'write_date'])
+        Category.flush_model(['name', 'write_date'])
+        if Category._fields['name'].translate:
+            inventory_keys = SQL("UNION SELECT jsonb_object_keys(i.name)")
+            inventory_value = SQL("COALESCE(i.name -> keys.lang, i.name -> 'en_US')")
+        else:
+            inventory_keys = SQL("")
+            inventory_value = SQL("to_jsonb(i.name::text)")
+        return SQL(
+            """
+            SELECT w.id,
+                   (SELECT jsonb_object_agg(keys.lang, %(inventory_value)s)
+                      FROM (SELECT jsonb_object_keys(w.name)
+                            UNION SELECT unnest(%(langs)s::varchar[])
+                            %(inventory_keys)s) AS keys(lang)) AS name
+              FROM product_public_category w
+              JOIN product_category i ON i.id = w.inventory_category_id
+             WHERE w.id = ANY(%(ids)s)
+               AND (w.id = ANY(%(created_ids)s) OR w.write_date <= i.write_date)
+            """,
+            inventory_value=inventory_value,
+            inventory_keys=inventory_keys,
+            langs=self._get_installed_langs(),
+            ids=list(website_category_ids),
+            created_ids=list(created_ids),
+        )
+
+    @api.model
+    def _get_installed_langs(self):
+        return [code for code, _name in self.env['res.lang'].get_installed()]
+
+    @api.model
+    def _find_category_renames(self, website_category_ids):
+        """:return: the mirrors `_sync_category_names` would rename, compared in every language"""
+        if not website_category_ids:
+            return []
+        self.env.cr.execute(SQL(
+            """
+            WITH target AS (%s)
+            SELECT w.id
+              FROM product_public_category w
+              JOIN target ON target.id = w.id
+             WHERE w.name IS DISTINCT FROM target.name
+            """,
+            self._inventory_name_targets(website_category_ids),
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _sync_category_names(self, website_category_ids, created_ids=()):
+        """Copy the inventory name into every language of the mirrored website
+        categories, with one statement over the JSONB `name` columns.
+
+        Only categories with at least one differing translation are written.
+
+        :return: the number of renamed categories
+        """
+        if not website_category_ids:
+            return 0
+        return self._update_category_names(self._inventory_name_targets(website_category_ids, created_ids))
+
+    @api.model
+    def _write_category_names(self, names):
+        """Write fixed names, e.g. the ones stored in a plan, into every language.
+
+        :param names: ``{web_cat_id: name}``
+        :return: the number of renamed categories
+        """
+        if not names:
+            return 0
+        self.env['product.public.category'].flush_model(['name'])
+        return self._update_category_names(SQL(
+            """
+            SELECT w.id,
+                   (SELECT jsonb_object_agg(keys.lang, to_jsonb(v.name))
+                      FROM (SELECT jsonb_object_keys(w.name)
+                            UNION SELECT unnest(%(langs)s::varchar[])) AS keys(lang)) AS name
+              FROM unnest(%(ids)s::int[], %(names)s::varchar[]) AS v(id, name)
+              JOIN product_public_category w ON w.id = v.id
+            """,
+            langs=self._get_installed_langs(),
+            ids=list(names),
+            names=list(names.values()),
+        ))
+
+    @api.model
+    def _update_category_names(self, targets):
+        """Apply the ``(id, name)`` rows selected by `targets` where they differ."""
+        self.env.cr.execute(SQL(
+            """
+            WITH target AS (%(targets)s)
+            UPDATE product_public_category w
+               SET name = target.name,
+                   write_date = (now() AT TIME ZONE 'UTC'),
+                   write_uid = %(uid)s
+              FROM target
+             WHERE target.id = w.id
+               AND w.name IS DISTINCT FROM target.name
+         RETURNING w.id
+            """,
+            targets=targets,
+            uid=self.env.uid,
+        ))
+        renamed_ids = [row[0] for row in self.env.cr.fetchall()]
+        if renamed_ids:
+            self.env['product.public.category'].browse(renamed_ids).invalidate_recordset(['name', 'display_name', 'write_date', 'write_uid'])
+            _logger.info(f"Renamed {len(renamed_ids)} website categories in {len(self._get_installed_langs())} languages.")
+        return len(renamed_ids)
+
+    @api.model
+    def _order_reparents(self, new_parents, current_parents):
+        """Order a set of moves root-first and take out the ones that would create a cycle.
+
+        :param new_parents: ``{web_cat_id: new_parent_id or False}``
+        :param current_parents: ``{web_cat_id: parent_id or False}`` for the moved
+                                categories, their new parents and all their ancestors
+        :return: ``(ordered_groups, cycle_ids)`` where `ordered_groups` is a list of
+                 ``(parent_id, [web_cat_ids])`` whose parents come before their children
+        """
+        def parent_of(category_id):
+            return new_parents.get(category_id, current_parents.get(category_id, False))
+
+        depths = {}
+        cycle_ids = set()
+        for category_id in new_parents:
+            path = []
+            node = category_id
+            # Walk up until a known depth, the root or a node already on the path
+            while node and node not in depths and node not in path:
+                path.append(node)
+                node = parent_of(node)
+            if node and node in path:
+                cycle_ids.update(path[path.index(node):])
+                depth = None
+            else:
+                depth = depths.get(node, -1) if node else -1
+            for path_node in reversed(path):
+                if depth is None or path_node in cycle_ids:
+                    depths[path_node] = None
+                    continue
+                depth += 1
+                depths[path_node] = depth
+
+        ids_by_parent = defaultdict(list)
+        for category_id, parent_id in new_parents.items():
+            if depths.get(category_id) is not None:
+                ids_by_parent[parent_id].append(category_id)
+        ordered_groups = sorted(
+            ids_by_parent.items(),
+            key=lambda group: depths.get(group[0], -1) if group[0] else -1,
+        )
+        return ordered_groups, cycle_ids
+
+    @api.model
+    def _apply_category_reparents(self, diff, website_category_map, full_tree=False):
+        """Reparent website categories in topological (root-first) order,
+        one statement per target parent.
+
+        On a full sync (`full_tree`), the whole tree is read and `parent_path` is
+        recomputed once. Otherwise only the ancestors of the moved categories are
+        read and `parent_path` is rewritten for the moved subtrees only, so the
+        cost scales with the branches. Moves that would create a cycle are
+        skipped and reported.
+
+        :return: the number of reparented categories
+        """
+        PublicCategory = self.env['product.public.category']
+        new_parents = {}
+        for inv_id, inv_parent_id in diff['reparent'].items():
+            parent_website_cat_id = website_category_map.get(inv_parent_id) if inv_parent_id else False
+            if inv_parent_id and not parent_website_cat_id:
+                _logger.warning(f"Could not find mapped parent website category for inventory parent ID {inv_parent_id}.")
                 continue
-            
-            website_cat = self.env['product.public.category'].browse(website_cat_id)
-            
-            if inv_cat.parent_id:
-                parent_website_cat_id = website_category_map.get(inv_cat.parent_id.id)
-                if parent_website_cat_id:
-                    if website_cat.parent_id.id != parent_website_cat_id:
-                        website_cat.parent_id = parent_website_cat_id
-                        _logger.info(f"Set parent for website category '{website_cat.name}' to '{website_cat.parent_id.name}'.")
-                else:
-                    _logger.warning(f"Could not find mapped parent website category for inventory parent: {inv_cat.parent_id.name} (ID: {inv_cat.parent_id.id}).")
-            elif website_cat.parent_id: # No parent in inventory, so ensure no parent on website
-                website_cat.parent_id = False
-                _logger.info(f"Set website category '{website_cat.name}' as a top-level category.")
-
-        # Third pass: Assign products to the correct website category hierarchy
-        all_managed_website_category_ids = self.env['product.public.category'].search([
-            ('inventory_category_id', '!=', False)
-        ]).ids
-        
-        all_products = self.env['product.template'].search([('categ_id', '!=', False)])
-
-        for product_tmpl in all_products:
-            inv_cat = product_tmpl.categ_id # Product's direct inventory category
-            
-            target_website_category_hierarchy_ids = []
-            temp_inv_cat = inv_cat
-            while temp_inv_cat:
-                mapped_web_cat_id = website_category_map.get(temp_inv_cat.id)
-                if mapped_web_cat_id:
-                    target_website_category_hierarchy_ids.append(mapped_web_cat_id)
-                else:
-                    _logger.warning(f"Inventory category {temp_inv_cat.name} (ID: {temp_inv_cat.id}) not in website_category_map for product '{product_tmpl.name}'. It might be a new/unprocessed category.")
-                    break 
-                temp_inv_cat = temp_inv_cat.parent_id
-            
-            current_public_ids_set = set(product_tmpl.public_categ_ids.ids)
-            
+            new_parents[website_category_map[inv_id]] = parent_website_cat_id
+        if not new_parents:
+            return 0
+
+        PublicCategory.flush_model(['parent_id', 'parent_path'])
+        if full_tree:
+            self.env.cr.execute("SELECT id, parent_id FROM product_public_category")
+        else:
+            self.env.cr.execute(SQL(
+                """
+                SELECT id, parent_id
+                  FROM product_public_category
+                 WHERE id IN (SELECT unnest(string_to_array(rtrim(parent_path, '/'), '/'))::int4
+                                FROM product_public_category
+                               WHERE id = ANY(%s))
+                """,
+                list(set(new_parents) | {parent_id for parent_id in new_parents.values() if parent_id}),
+            ))
+        current_parents = dict(self.env.cr.fetchall())
+        ordered_groups, cycle_ids = self._order_reparents(new_parents, current_parents)
+        if cycle_ids:
+            skipped_count = len(new_parents) - sum(len(ids) for _parent, ids in ordered_groups)
+            _logger.error(f"Skipped reparenting {skipped_count} website categories: the new parents would create a cycle through {sorted(cycle_ids)}.")
+
+        for parent_website_cat_id, website_cat_ids in ordered_groups:
+            self.env.cr.execute(SQL(
+                """
+                UPDATE product_public_category
+                   SET parent_id = %s, write_date = (now() AT TIME ZONE 'UTC'), write_uid = %s
+                 WHERE id = ANY(%s)
+                """,
+                parent_website_cat_id or None, self.env.uid, website_cat_ids,
+            ))
+            if not full_tree:
+                # Swap the old prefix of each moved subtree for the new parent's path, which is
+                # final since groups come root-first. A node below two moved categories of the
+                # group takes the closest one.
+                self.env.cr.execute(SQL(
+                    """
+                    UPDATE product_public_category node
+                       SET parent_path = target.parent_path
+                      FROM (SELECT DISTINCT ON (node.id) node.id,
+                                   COALESCE((SELECT parent_path FROM product_public_category WHERE id = %(parent_id)s), '')
+                                   || moved.id || '/' || substr(node.parent_path, length(moved.parent_path) + 1) AS parent_path
+                              FROM product_public_category node
+                              JOIN product_public_category moved ON node.parent_path LIKE moved.parent_path || '%%'
+                             WHERE moved.id = ANY(%(ids)s)
+                          ORDER BY node.id, length(moved.parent_path) DESC) AS target
+                     WHERE target.id = node.id
+                    """,
+                    parent_id=parent_website_cat_id or None,
+                    ids=website_cat_ids,
+                ))
+        if full_tree:
+            # One parent_path recomputation for the whole tree instead of one per moved subtree
+            PublicCategory._parent_store_compute()
+        PublicCategory.invalidate_model(['parent_id', 'parent_path', 'child_id', 'write_date', 'write_uid'])
+        self.env['category.sync.product.ancestor']._refresh_categories(
+            [website_cat_id for _parent, website_cat_ids in ordered_groups for website_cat_id in website_cat_ids]
+        )
+
+        reparented_count = sum(len(ids) for _parent, ids in ordered_groups)
+        _logger.info(f"Reparented {reparented_count} website categories in {len(ordered_groups)} groups.")
+        return reparented_count
+
+    @api.model
+    def _sync_category_tree(self, inventory_domain=None, stats=None, website_ids=None):
+        """First and second pass: diff the (partial) inventory tree against its
+        mirror on each target website in memory, then create, rename and
+        reparent website categories in batches.
+
+        The inventory tree and the mirrors of all websites are read once.
+
+        :return: ``{website_id: {inv_cat_id: web_cat_id}}`` for every category in scope
+        """
+        stats = stats or SyncRunStats(self.env.cr)
+        website_ids = website_ids or self._get_target_website_ids()
+        with stats.phase('categories') as metrics:
+            inventory_rows = self._read_inventory_categories(inventory_domain)
+            mappings = self._read_website_mappings(website_ids, None if inventory_domain is None else inventory_rows)
+            metrics['rows_read'] += len(inventory_rows) + sum(len(mapping) for mapping in mappings.values())
+
+        website_category_maps = {}
+        for website_id, mapping in mappings.items():
+            with stats.phase('categories'):
+                website_category_map = {inv_id: row['id'] for inv_id, row in mapping.items()} # {inv_cat_id: web_cat_id}
+                diff = self._diff_category_trees(inventory_rows, mapping)
+            self._apply_category_diff(diff, inventory_rows, website_category_map, stats, website_id, inventory_domain is None)
+            website_category_maps[website_id] = website_category_map
+        return website_category_maps
+
+    @api.model
+    def _build_ancestor_index(self, inventory_category_ids, website_category_maps):
+        """Precompute the website hierarchy of each inventory category from `parent_path`.
+
+        For each website mirror, the chain goes from the category up to its
+        root and stops at the first ancestor without a website mirror.
+
+        :param website_category_maps: list of ``{inv_cat_id: web_cat_id}``, one per website
+        :return: ``{inv_cat_id: tuple(web_cat_ids)}``
+        """
+        index = {}
+        rows = self.env['product.category'].browse(inventory_category_ids).read(['parent_path'])
+        for row in rows:
+            ancestor_ids = [int(i) for i in reversed(row['parent_path'].split('/')) if i]
+            chain = []
+            for website_category_map in website_category_maps:
+                for ancestor_id in ancestor_ids:
+                    mapped_web_cat_id = website_category_map.get(ancestor_id)
+                    if not mapped_web_cat_id:
+                        _logger.warning(f"Inventory category ID {ancestor_id} not in website_category_map for the products of inventory category ID {row['id']}. It might be a new/unprocessed category.")
+                        break
+                    chain.append(mapped_web_cat_id)
+            index[row['id']] = tuple(chain)
+        return index
+
+    @api.model
+    def _read_product_public_categories(self, product_ids):
+        """Read the inventory category and current website categories of
+        `product_ids` with one query on the relation table.
+
+        :return: ``{product_id: (categ_id, [web_cat_ids])}``
+        """
+        ProductTemplate = self.env['product.template']
+        ProductTemplate.flush_model(['categ_id', 'public_categ_ids'])
+        field = ProductTemplate._fields['public_categ_ids']
+        self.env.cr.execute(SQL(
+            """
+            SELECT pt.id, pt.categ_id,
+                   COALESCE(array_agg(rel.%(category_column)s) FILTER (WHERE rel.%(category_column)s IS NOT NULL), '{}')
+              FROM product_template pt
+         LEFT JOIN %(relation)s rel ON rel.%(product_column)s = pt.id
+             WHERE pt.id = ANY(%(product_ids)s)
+          GROUP BY pt.id
+            """,
+            category_column=SQL.identifier(field.column2),
+            product_column=SQL.identifier(field.column1),
+            relation=SQL.identifier(field.relation),
+            product_ids=list(product_ids),
+        ))
+        return {product_id: (categ_id, public_ids) for product_id, categ_id, public_ids in self.env.cr.fetchall()}
+
+    @api.model
+    def _sync_product_categories(self, products, website_category_maps, stats=None):
+        """Third pass: assign products to the website category hierarchy of their inventory category.
+
+        Products are written in one batch per distinct set of website categories.
+        """
+        stats = stats or SyncRunStats(self.env.cr)
+        with stats.phase('products') as metrics:
+            metrics['rows_read'] += len(products)
+            metrics['rows_written'] += self._assign_product_categories(products, website_category_maps)
+
+    @api.model
+    def _compute_product_assignments(self, product_ids, website_category_maps):
+        """Compute the website categories each product should have, without writing.
+
+        :return: ``{frozenset(web_cat_ids): [product_ids]}`` for the products that change
+        """
+        product_ids_by_target = defaultdict(list)
+        for product_id, _current_public_ids, final_public_ids in self._iter_product_assignments(product_ids, website_category_maps):
+            product_ids_by_target[frozenset(final_public_ids)].append(product_id)
+        return product_ids_by_target
+
+    @api.model
+    def _compute_product_assignment_deltas(self, product_ids, website_category_maps):
+        """Same as `_compute_product_assignments`, as managed categories to add and remove.
+
+        :return: ``{(frozenset(added_ids), frozenset(removed_ids)): [product_ids]}``
+        """
+        product_ids_by_delta = defaultdict(list)
+        for product_id, current_public_ids, final_public_ids in self._iter_product_assignments(product_ids, website_category_maps):
+            delta = (frozenset(final_public_ids - current_public_ids), frozenset(current_public_ids - final_public_ids))
+            product_ids_by_delta[delta].append(product_id)
+        return product_ids_by_delta
+
+    @api.model
+    def _iter_product_assignments(self, product_ids, website_category_maps):
+        """Yield ``(product_id, current_public_ids, final_public_ids)`` for the products that change."""
+        managed_website_category_ids = self.env['product.public.category']._get_managed_category_ids()
+
+        product_rows = self._read_product_public_categories(product_ids)
+        ancestor_index = self._build_ancestor_index(
+            list({categ_id for categ_id, _public_ids in product_rows.values() if categ_id}), website_category_maps,
+        )
+
+        for product_id, (categ_id, current_public_ids) in product_rows.items():
+            current_public_ids_set = set(current_public_ids)
+
             # Start with non-managed categories the product is already in
-            final_public_ids_set = {pid for pid in current_public_ids_set if pid not in all_managed_website_category_ids}
-            
+            final_public_ids_set = current_public_ids_set - managed_website_category_ids
+
             # Add the target hierarchy
-            for target_id in target_website_category_hierarchy_ids:
-                final_public_ids_set.add(target_id)
-            
+            final_public_ids_set.update(ancestor_index.get(categ_id, ()))
+
             if final_public_ids_set != current_public_ids_set:
-                product_tmpl.public_categ_ids = [(6, 0, list(final_public_ids_set))]
-                _logger.info(f"Updated website categories for product '{product_tmpl.name}' (ID: {product_tmpl.id}) based on inventory category '{inv_cat.name}'. New Web IDs: {list(final_public_ids_set)}")
+                yield product_id, current_public_ids_set, final_public_ids_set
 
-        _logger.info("Synchronization of inventory categories to website categories completed.")
+    @api.model
+    def _write_product_assignments(self, product_ids_by_target):
+        """Write the result of `_compute_product_assignments`, one batch per target set.
+
+        :return: the number of updated products
+        """
+        ProductTemplate = self.env['product.template']
+        for final_public_ids_set, product_ids in product_ids_by_target.items():
+            ProductTemplate.browse(product_ids).write({'public_categ_ids': [(6, 0, list(final_public_ids_set))]})
+            _logger.info(f"Updated website categories for {len(product_ids)} products. New Web IDs: {sorted(final_public_ids_set)}")
+        ProductTemplate.flush_model()
+        return sum(len(product_ids) for product_ids in product_ids_by_target.values())
+
+    @api.model
+    def _bulk_assign_product_categories(self, product_ids, website_category_maps):
+        """Set-based variant of `_assign_product_categories` for whole-catalog passes.
+
+        The target rows of every product are loaded with ``COPY`` into a temporary
+        table, then the relation table gets one ``DELETE`` of the stale managed rows
+        and one ``INSERT`` of the missing ones. Non-managed categories are kept.
+        The ORM is bypassed: no write hooks run and the caches are dropped.
+
+        :return: the number of updated products
+        """
+        if not product_ids:
+            return 0
+        ProductTemplate = self.env['product.template']
+        ProductTemplate.flush_model(['categ_id', 'public_categ_ids'])
+        self.env['product.public.category'].flush_model(['inventory_category_id'])
+        field = ProductTemplate._fields['public_categ_ids']
+        cr = self.env.cr
+
+        cr.execute(SQL(
+            "SELECT id, categ_id FROM product_template WHERE id = ANY(%s) AND categ_id IS NOT NULL", list(product_ids),
+        ))
+        product_categories = cr.fetchall()
+        ancestor_index = self._build_ancestor_index(
+            list({categ_id for _product_id, categ_id in product_categories}), website_category_maps,
+        )
+        buffer = io.StringIO(''.join(
+            f"{product_id}\t{web_cat_id}\n"
+            for product_id, categ_id in product_categories
+            for web_cat_id in set(ancestor_index.get(categ_id, ()))
+        ))
+        cr.execute("DROP TABLE IF EXISTS wcs_product_public_category")
+        cr.execute("CREATE TEMP TABLE wcs_product_public_category (product_id int4, category_id int4) ON COMMIT DROP")
+        cr.copy_expert("COPY wcs_product_public_category (product_id, category_id) FROM STDIN", buffer)
+        cr.execute("ANALYZE wcs_product_public_category")
+
+        sql_params = {
+            'relation': SQL.identifier(field.relation),
+            'product_column': SQL.identifier(field.column1),
+            'category_column': SQL.identifier(field.column2),
+        }
+        cr.execute(SQL(
+            """
+            DELETE FROM %(relation)s rel
+             WHERE rel.%(product_column)s = ANY(%(product_ids)s)
+               AND rel.%(category_column)s IN (SELECT id FROM product_public_category WHERE inventory_category_id IS NOT NULL)
+               AND NOT EXISTS (SELECT 1 FROM wcs_product_public_category target
+                                WHERE target.product_id = rel.%(product_column)s
+                                  AND target.category_id = rel.%(category_column)s)
+         RETURNING rel.%(product_column)s
+            """,
+            product_ids=list(product_ids),
+            **sql_params,
+        ))
+        updated_ids = {row[0] for row in cr.fetchall()}
+        cr.execute(SQL(
+            """
+            INSERT INTO %(relation)s (%(product_column)s, %(category_column)s)
+            SELECT product_id, category_id FROM wcs_product_public_category
+                ON CONFLICT DO NOTHING
+         RETURNING %(product_column)s
+            """,
+            **sql_params,
+        ))
+        updated_ids.update(row[0] for row in cr.fetchall())
+
+        self.env.invalidate_all()
+        self.env['category.sync.product.ancestor']._refresh(updated_ids)
+        _logger.info(f"Rewrote the website categories of {len(updated_ids)} products with a bulk diff of the relation table.")
+        return len(updated_ids)
+
+    @api.model
+    def _get_product_workers(self):
+        if self.env.registry.in_test_mode():
+            return 1 # Test cursors cannot be shared with other threads
+        ICP = self.env['ir.config_parameter'].sudo()
+        return max(1, int(ICP.get_param('website_category_sync.product_workers', DEFAULT_PRODUCT_WORKERS)))
+
+    @api.model
+    def _partition_product_categories(self, workers):
+        """Split the inventory categories holding products into at most `workers`
+        partitions of similar product counts. A product belongs to exactly one
+        partition, so partitions can be written concurrently without conflicts.
+
+        :return: a list of inventory category ID lists
+        """
+        groups = self.env['product.template']._read_group([('categ_id', '!=', False)], ['categ_id'], ['__count'])
+        partitions = [[0, []] for _i in range(workers)]
+        for category, count in sorted(groups, key=lambda group: group[1], reverse=True):
+            partition = min(partitions, key=lambda partition: partition[0])
+            partition[0] += count
+            partition[1].append(category.id)
+        return [category_ids for _count, category_ids in partitions if category_ids]
+
+    @api.model
+    def _sync_product_partition(self, category_ids, website_category_maps):
+        """Assign the products of one partition of inventory categories.
+
+        :return: ``(rows_read, rows_written, queries)``
+        """
+        queries = self.env.cr.sql_log_count
+        products = self.env['product.template'].search([('categ_id', 'in', category_ids)])
+        written = self._bulk_assign_product_categories(products.ids, website_category_maps)
+        return len(products), written, self.env.cr.sql_log_count - queries
+
+    def _run_product_partition(self, category_ids, website_category_maps):
+        """Worker thread entry point: sync one partition in its own transaction.
+
+        Partitions share their ancestor categories, so the product counts are
+        left to `_update_all_product_counts` once every worker is done.
+        """
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, dict(self.env.context, category_sync_skip_counts=True))
+            return env['category.sync.manager']._sync_product_partition(category_ids, website_category_maps)
+
+    def _update_all_product_counts(self):
+        """Recount every category in a new transaction, which sees the rows committed by the workers."""
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            env['product.public.category']._update_product_counts()
+        self.env.invalidate_all()
+
+    @api.model
+    def _sync_all_product_categories(self, website_category_maps, stats):
+        """Product pass of the full sync, spread over `website_category_sync.product_workers` threads.
+
+        Workers use their own cursors, so the category passes are committed first;
+        the sync lock is then taken again and held until every worker is done.
+
+        :return: False when another sync took the lock meanwhile and the product pass was skipped
+        """
+        workers = self._get_product_workers()
+        if workers == 1:
+            with stats.phase('products') as metrics:
+                all_products = self.env['product.template'].search([('categ_id', '!=', False)])
+                metrics['rows_read'] += len(all_products)
+                metrics['rows_written'] += self._bulk_assign_product_categories(all_products.ids, website_category_maps)
+            return True
+
+        partitions = self._partition_product_categories(workers)
+        self.env.cr.commit()
+        if not self._acquire_sync_lock(raise_exception=False):
+            _logger.warning("Another category synchronization started meanwhile, the product pass was skipped.")
+            return False
+        _logger.info(f"Assigning products in {len(partitions)} parallel partitions.")
+        with stats.phase('products') as metrics, ThreadPoolExecutor(max_workers=len(partitions)) as executor:
+            futures = [
+                executor.submit(self._run_product_partition, category_ids, website_category_maps)
+                for category_ids in partitions
+            ]
+            for future in futures:
+                rows_read, rows_written, queries = future.result()
+                metrics['rows_read'] += rows_read
+                metrics['rows_written'] += rows_written
+                metrics['queries'] += queries
+        self._update_all_product_counts()
+        return True
+
+    @api.model
+    def _assign_product_categories(self, products, website_category_maps):
+        """:return: the number of updated products"""
+        return self._write_product_assignments(self._compute_product_assignments(products.ids, website_category_maps))
+
+    @api.model
+    def _find_orphan_categories(self):
+        """Mirrored website categories whose inventory category no longer exists, with one anti-join."""
+        self.env['product.public.category'].flush_model(['inventory_category_id', 'inventory_mirror'])
+        self.env.cr.execute("""
+            SELECT c.id
+              FROM product_public_category c
+         LEFT JOIN product_category i ON i.id = c.inventory_category_id
+             WHERE c.inventory_mirror
+               AND i.id IS NULL
+          ORDER BY c.id
+        """)
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def prune_orphan_categories(self, batch_size=PRUNE_BATCH_SIZE):
+        """Delete the mirrored website categories whose source was deleted.
+
+        Their products are detached with a single statement on the relation
+        table, then the categories are deleted in batches. Website categories
+        have no `active` field, so they cannot be archived instead.
+
+        :return: the number of deleted categories
+        """
+        orphan_ids = self._find_orphan_categories()
+        if not orphan_ids:
+            return 0
+        PublicCategory = self.env['product.public.category']
+        ProductTemplate = self.env['product.template']
+
+        field = ProductTemplate._fields['public_categ_ids']
+        ProductTemplate.flush_model(['public_categ_ids'])
+        self.env.cr.execute(SQL(
+            "DELETE FROM %s WHERE %s = ANY(%s) RETURNING %s",
+            SQL.identifier(field.relation), SQL.identifier(field.column2), orphan_ids, SQL.identifier(field.column1),
+        ))
+        detached_product_ids = {row[0] for row in self.env.cr.fetchall()}
+        detached_count = self.env.cr.rowcount
+        ProductTemplate.invalidate_model(['public_categ_ids'])
+        PublicCategory.invalidate_model(['product_tmpl_ids'])
+
+        # Deleting a parent cascades to its children: detach the ones that are still valid,
+        # the parent pass attaches them again. Raw SQL keeps their `write_date`, so the
+        # newer-wins check of the diff does not mistake the detachment for a website edit.
+        PublicCategory.flush_model(['parent_id', 'parent_path'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE product_public_category node
+               SET parent_id = CASE WHEN node.id = target.root_id THEN NULL ELSE node.parent_id END,
+                   parent_path = target.parent_path
+              FROM (SELECT DISTINCT ON (node.id) node.id, root.id AS root_id,
+                           substr(node.parent_path, length(root.parent_path) - length(root.id || '/') + 1) AS parent_path
+                      FROM product_public_category node
+                      JOIN product_public_category root ON node.parent_path LIKE root.parent_path || '%%'
+                     WHERE root.parent_id = ANY(%(orphan_ids)s)
+                       AND root.id != ALL(%(orphan_ids)s)
+                  ORDER BY node.id, length(root.parent_path) DESC) AS target
+             WHERE target.id = node.id
+         RETURNING target.root_id
+            """,
+            orphan_ids=orphan_ids,
+        ))
+        detached_root_ids = list({row[0] for row in self.env.cr.fetchall()})
+        PublicCategory.invalidate_model(['parent_id', 'parent_path', 'child_id'])
+        self.env['category.sync.product.ancestor']._refresh_categories(detached_root_ids)
+
+        for start in range(0, len(orphan_ids), batch_size):
+            # Orphaned children of an earlier batch are already gone through the `parent_id` cascade
+            PublicCategory.browse(orphan_ids[start:start + batch_size]).exists().unlink()
+        self.env['category.sync.product.ancestor']._refresh(detached_product_ids)
+        _logger.info(f"Pruned {len(orphan_ids)} orphaned website categories and detached {detached_count} product links.")
+        return len(orphan_ids)
+
+    @api.model
+    def sync_categories_to_website(self):
+        self._acquire_sync_lock()
+        _logger.info("Starting synchronization of inventory categories to website categories...")
+
+        stats = SyncRunStats(self.env.cr)
+        with stats.phase('categories') as metrics:
+            metrics['rows_written'] += self.prune_orphan_categories()
+        website_category_maps = self._sync_category_tree(stats=stats)
+        if not self._sync_all_product_categories(list(website_category_maps.values()), stats):
+            return False
+
+        run = self.env['category.sync.run']._record('full', stats)
+        _logger.info(f"Synchronization of inventory categories to website categories completed in {run.duration:.2f}s ({run.queries} queries).")
         return True
 
+    @api.model
+    def sync_categories_to_inventory(self, website_id=False):
+        """Reverse sync: push names and parents edited on the mirrored website
+        categories of `website_id` back to their inventory categories.
+
+        Both trees are read in one query each and compared with the same diff
+        engine as the forward sync. On conflicts, the side with the most recent
+        `write_date` wins: inventory categories edited after their mirror are
+        left untouched.
+        """
+        self._acquire_sync_lock()
+        Category = self.env['product.category']
+        stats = SyncRunStats(self.env.cr)
+        with stats.phase('categories') as metrics:
+            website_rows = self.env['product.public.category'].search_read([
+                ('inventory_category_id', '!=', False), ('website_id', '=', website_id),
+            ], ['name', 'parent_id', 'inventory_category_id', 'write_date'], load=None)
+            web_to_inv = {row['id']: row['inventory_category_id'] for row in website_rows}
+            # The website tree becomes the source, keyed by inventory category like the forward sync.
+            source_rows = {}
+            for row in website_rows:
+                if row['parent_id'] and row['parent_id'] not in web_to_inv:
+                    continue # Below a website-only category: no inventory equivalent for its parent
+                source_rows.setdefault(row['inventory_category_id'], {
+                    'name': row['name'],
+                    'parent_id': web_to_inv.get(row['parent_id'], False),
+                    'write_date': row['write_date'],
+                })
+            inventory_rows = Category.search_read(
+                [('id', 'in', list(source_rows))], ['name', 'parent_id', 'write_date'], load=None,
+            )
+            mapping = {row['id']: row for row in inventory_rows}
+            metrics['rows_read'] += len(website_rows) + len(inventory_rows)
+
+            # The diff engine leaves out the inventory categories edited after their mirror
+            diff = self._diff_category_trees(source_rows, mapping)
+            renames = diff['rename']
+            reparents = {inv_id: parent_id for inv_id, parent_id in diff['reparent'].items() if inv_id in mapping}
+
+            ids_by_name = defaultdict(list)
+            for inv_id, name in renames.items():
+                ids_by_name[name].append(inv_id)
+            for name, category_ids in ids_by_name.items():
+                Category.browse(category_ids).write({'name': name})
+            metrics['rows_written'] += len(renames)
+
+        with stats.phase('parents') as metrics:
+            Category.flush_model(['parent_id'])
+            self.env.cr.execute("SELECT id, parent_id FROM product_category")
+            current_parents = dict(self.env.cr.fetchall())
+            metrics['rows_read'] += len(current_parents)
+            ordered_groups, cycle_ids = self._order_reparents(reparents, current_parents)
+            if cycle_ids:
+                _logger.error(f"Skipped pushing the parents of inventory categories around {sorted(cycle_ids)} back from the website: they would create a cycle.")
+            for parent_id, category_ids in ordered_groups:
+                Category.browse(category_ids).write({'parent_id': parent_id})
+            Category.flush_model()
+            metrics['rows_written'] += sum(len(ids) for _parent, ids in ordered_groups)
+
+        self.env['category.sync.run']._record('reverse', stats)
+        reparented_count = sum(len(ids) for _parent, ids in ordered_groups)
+        _logger.info(f"Pushed {len(renames)} renames and {reparented_count} reparents from website categories back to inventory categories.")
+        return True
+
+    @api.model
+    def plan_sync(self):
+        """Compute the complete change set of a full sync with read-only queries.
+
+        Categories that do not exist yet are referenced in the product targets
+        by a negative placeholder, ``-(index + 1)`` in the plan's ``new`` list
+        of ``[website_id, inv_cat_id]``, resolved when the plan is applied.
+
+        :return: a new `category.sync.plan` record
+        """
+        inventory_rows = self._read_inventory_categories()
+        mappings = self._read_website_mappings(self._get_target_website_ids())
+
+        websites = {}
+        new_categories = []
+        planned_category_maps = []
+        for website_id, mapping in mappings.items():
+            website_category_map = {inv_id: row['id'] for inv_id, row in mapping.items()}
+            diff = self._diff_category_trees(inventory_rows, mapping)
+            planned_category_map = dict(website_category_map)
+            for inv_id in diff['create']:
+                new_categories.append([website_id, inv_id])
+                planned_category_map[inv_id] = -len(new_categories)
+            planned_category_maps.append(planned_category_map)
+            # Same all-languages comparison as the sync, instead of the diff's current-language one
+            web_to_inv = {web_id: inv_id for inv_id, web_id in website_category_map.items()}
+            renames = {
+                web_to_inv[web_id]: inventory_rows[web_to_inv[web_id]]['name']
+                for web_id in self._find_category_renames(list(website_category_map.values()))
+                if web_to_inv[web_id] in inventory_rows
+            }
+            websites[website_id or 0] = {
+                'create': {inv_id: inventory_rows[inv_id]['name'] for inv_id in diff['create']},
+                'rename': renames,
+                'reparent': diff['reparent'],
+                'website_category_map': website_category_map,
+            }
+
+        product_ids = self.env['product.template'].search([('categ_id', '!=', False)]).ids
+        # Deltas rather than absolute targets: applying the plan keeps the changes made meanwhile
+        product_ids_by_delta = self._compute_product_assignment_deltas(product_ids, planned_category_maps)
+
+        return self.env['category.sync.plan'].create({
+            'create_count': len(new_categories),
+            'rename_count': sum(len(data['rename']) for data in websites.values()),
+            'reparent_count': sum(len(data['reparent']) for data in websites.values()),
+            'product_count': sum(len(ids) for ids in product_ids_by_delta.values()),
+            'plan_data': {
+                'websites': websites,
+                'new': new_categories,
+                'products': [[sorted(added), sorted(removed), ids] for (added, removed), ids in product_ids_by_delta.items()],
+            },
+        })
+
+    @api.model
+    def _apply_plan_data(self, plan_data, stats=None, date_planned=None):
+        """Apply the change set stored by `plan_sync` without recomputing it.
+
+        Products are only given the managed categories added and removed by the
+        plan. Products modified after `date_planned` are queued for an incremental
+        sync instead, since their planned delta may be outdated.
+        """
+        stats = stats or SyncRunStats(self.env.cr)
+        website_category_maps = {}
+        # JSON turned the integer keys into strings
+        for website_key, data in plan_data['websites'].items():
+            website_id = int(website_key) or False
+            website_category_map = {int(inv_id): web_id for inv_id, web_id in data['website_category_map'].items()}
+            created = {int(inv_id): name for inv_id, name in data['create'].items()}
+            diff = {
+                'create': list(created),
+                'rename': {int(inv_id): name for inv_id, name in data['rename'].items()},
+                'reparent': {int(inv_id): parent_id for inv_id, parent_id in data['reparent'].items()},
+            }
+            inventory_rows = {inv_id: {'name': name} for inv_id, name in created.items()}
+            self._apply_category_diff(diff, inventory_rows, website_category_map, stats, website_id, planned=True)
+            website_category_maps[website_id] = website_category_map
+
+        placeholders = {
+            -(index + 1): website_category_maps[website_id or False][inv_id]
+            for index, (website_id, inv_id) in enumerate(plan_data['new'])
+        }
+        with stats.phase('products') as metrics:
+            # Skip the products deleted since the plan was computed
+            products = self.env['product.template'].browse(
+                [product_id for _added, _removed, product_ids in plan_data['products'] for product_id in product_ids]
+            ).exists()
+            if date_planned:
+                changed_products = products.filtered(lambda product: product.write_date > date_planned)
+                self._queue_product_changes(changed_products)
+                products -= changed_products
+            existing_product_ids = set(products.ids)
+            metrics['rows_read'] += len(existing_product_ids)
+
+            ProductTemplate = self.env['product.template']
+            for added, removed, product_ids in plan_data['products']:
+                product_ids = [pid for pid in product_ids if pid in existing_product_ids]
+                if not product_ids:
+                    continue
+                commands = [Command.link(placeholders[web_id] if web_id < 0 else web_id) for web_id in added]
+                commands += [Command.unlink(web_id) for web_id in removed]
+                ProductTemplate.browse(product_ids).write({'public_categ_ids': commands})
+                metrics['rows_written'] += len(product_ids)
+            ProductTemplate.flush_model()
+        return True
+
+    @api.model
+    def _queue_category_changes(self, categories, subtree=False):
+        """Queue inventory categories for the next incremental flush.
+
+        With `subtree`, the products of every descendant category are
+        re-assigned as well (used when the position in the tree changed).
+        """
+        if not categories or self.env.context.get('category_sync_skip_queue'):
+            return
+        self.env['category.sync.queue'].sudo().create([{
+            'res_model': 'product.category',
+            'res_id': category_id,
+            'subtree': subtree,
+        } for category_id in categories.ids])
+        self._trigger_queue_flush()
+
+    @api.model
+    def _queue_product_changes(self, products):
+        """Queue product templates whose inventory category changed."""
+        if not products or self.env.context.get('category_sync_skip_queue'):
+            return
+        self.env['category.sync.queue'].sudo().create([{
+            'res_model': 'product.template',
+            'res_id': product_id,
+        } for product_id in products.ids])
+        self._trigger_queue_flush()
+
+    @api.model
+    def _trigger_queue_flush(self):
+        cron = self.env.ref('website_category_sync.ir_cron_flush_category_sync_queue', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _get_category_scope(self, categories):
+        """Return the IDs of `categories` and all of their ancestors, from `parent_path`."""
+        scope = set()
+        for path in categories.mapped('parent_path'):
+            scope.update(int(category_id) for category_id in path.split('/') if category_id)
+        return scope
+
+    @api.model
+    def _sync_partial(self, categories, products, stats=None):
+        """Sync `categories` and re-assign `products`, leaving the rest of the catalog untouched."""
+        # The mirror of every ancestor is needed to compute parents and product hierarchies.
+        scope = self._get_category_scope(categories | products.categ_id)
+        website_category_maps = None
+        if not categories:
+            # Products only: reuse the cached mapping when it already mirrors the whole scope.
+            website_category_maps = self.get_website_category_maps()
+            if not all(scope <= website_category_map.keys() for website_category_map in website_category_maps.values()):
+                website_category_maps = None
+        if website_category_maps is None:
+            website_category_maps = self._sync_category_tree([('id', 'in', list(scope))], stats)
+        if products:
+            self._sync_product_categories(products, list(website_category_maps.values()), stats)
+        return website_category_maps
+
+    @api.model
+    def sync_subtree(self, category_ids):
+        """Sync only the branches rooted at `category_ids` and the products below them.
+
+        The cost scales with the size of the branches, not of the catalog.
+        """
+        self._acquire_sync_lock()
+        categories = self.env['product.category'].search([('id', 'child_of', list(category_ids))])
+        products = self.env['product.template'].search([('categ_id', 'child_of', list(category_ids))])
+        _logger.info(f"Synchronizing {len(categories)} inventory categories and {len(products)} products below categories {list(category_ids)}.")
+        stats = SyncRunStats(self.env.cr)
+        self._sync_partial(categories, products, stats)
+        self.env['category.sync.run']._record('subtree', stats)
+        return True
+
+    @api.model
+    def flush_sync_queue(self):
+        """Incremental sync: only touch the queued categories, the subtrees
+        queued with `subtree` and the products below them."""
+        entries = self.env['category.sync.queue'].sudo().search([])
+        if not entries:
+            return False
+        self._acquire_sync_lock()
+
+        Category = self.env['product.category']
+        category_entries = entries.filtered(lambda e: e.res_model == 'product.category')
+        categories = Category.browse(set(category_entries.mapped('res_id'))).exists()
+        subtree_roots = Category.browse(set(category_entries.filtered('subtree').mapped('res_id'))).exists()
+        products = self.env['product.template'].browse(
+            set(entries.filtered(lambda e: e.res_model == 'product.template').mapped('res_id'))
+        ).exists()
+        if subtree_roots:
+            categories |= Category.search([('id', 'child_of', subtree_roots.ids)])
+            products |= self.env['product.template'].search([('categ_id', 'child_of', subtree_roots.ids)])
+
+        _logger.info(f"Flushing category sync queue: {len(categories)} categories, {len(products)} products.")
+        stats = SyncRunStats(self.env.cr)
+        self._sync_partial(categories, products, stats)
+        self.env['category.sync.run']._record('incremental', stats)
+        entries.unlink()
+        return True
+
+    @api.model
+    def _cron_flush_sync_queue(self):
+        if not self._acquire_sync_lock(raise_exception=False):
+            _logger.info("Another category synchronization is running, the queue will be flushed by the next run.")
+            return
+        self.flush_sync_queue()
+
+    @api.model
+    def _get_inventory_tree_signature(self):
+        """Fingerprint the inventory tree in one query.
+
+        :return: ``(signature, last_write_date)``
+        """
+        self.env['product.category'].flush_model(['name', 'parent_id'])
+        self.env.cr.execute("""
+            SELECT md5(count(*) || '|' || COALESCE(string_agg(id || ':' || COALESCE(parent_id, 0) || ':' || name, ',' ORDER BY id), '')),
+                   max(write_date)
+              FROM product_category
+        """)
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _cron_auto_sync(self):
+        """Scheduled sync, skipped when the inventory tree did not change since
+        the last run and postponed while it is still being edited.
+
+        The sync itself runs as a background job, which stores the signature
+        once it is done.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        signature, last_write_date = self._get_inventory_tree_signature()
+        if signature == ICP.get_param('website_category_sync.last_signature'):
+            return False
+
+        debounce = timedelta(minutes=int(ICP.get_param('website_category_sync.debounce_minutes', DEFAULT_DEBOUNCE_MINUTES)))
+        quiet_since = (last_write_date or datetime.min) + debounce
+        if quiet_since > fields.Datetime.now():
+            # Edits are still coming in: check again once they have settled.
+            _logger.info(f"Inventory categories changed recently, postponing the automatic sync until {quiet_since}.")
+            self.env.ref('website_category_sync.ir_cron_auto_sync_categories')._trigger(at=quiet_since)
+            return False
+
+        Job = self.env['category.sync.job']
+        if Job.search_count([('state', 'in', ('pending', 'running'))], limit=1):
+            # It may have read the tree before these changes: check again on the next run.
+            _logger.info("A category sync job is still running, postponing the automatic sync.")
+            return False
+        Job.enqueue(signature)
+        return True
+
+
 class ResConfigSettings(models.TransientModel):
     _inherit = 'res.config.settings'
 
+    website_category_sync_mirror = fields.Boolean(related='website_id.category_sync_mirror', readonly=False)
+    category_sync_job_id = fields.Many2one('category.sync.job', compute='_compute_category_sync_job_id')
+    category_sync_job_state = fields.Selection(related='category_sync_job_id.state')
+    category_sync_job_phase = fields.Selection(related='category_sync_job_id.phase')
+    category_sync_job_progress = fields.Float(related='category_sync_job_id.progress')
+
+    category_sync_run_id = fields.Many2one('category.sync.run', compute='_compute_category_sync_run_id')
+    category_sync_run_duration = fields.Float(related='category_sync_run_id.duration')
+    category_sync_run_queries = fields.Integer(related='category_sync_run_id.queries')
+
+    def _compute_category_sync_job_id(self):
+        job = self.env['category.sync.job'].search([], order='id desc', limit=1)
+        for settings in self:
+            settings.category_sync_job_id = job
+
+    def _compute_category_sync_run_id(self):
+        run = self.env['category.sync.run'].search([], order='id desc', limit=1)
+        for settings in self:
+            settings.category_sync_run_id = run
+
     def action_sync_inventory_categories_to_website(self):
-        self.env['category.sync.manager'].sync_categories_to_website()
+        job = self.env['category.sync.job'].enqueue()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Synchronization Queued'),
+                'message': _('Inventory to Website category synchronization runs in the background (job #%s). Reload the settings to follow its progress.') % job.id,
+                'type': 'info',
+                'sticky': False,
+            }
+        }
+
+    def action_plan_inventory_categories_sync(self):
+        plan = self.env['category.sync.manager'].plan_sync()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'category.sync.plan',
+            'res_id': plan.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+    def action_sync_website_categories_to_inventory(self):
+        website_id = self.website_id.id if self.website_category_sync_mirror else False
+        self.env['category.sync.manager'].sync_categories_to_inventory(website_id)
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
                 'title': _('Synchronization Complete'),
-                'message': _('Inventory to Website category synchronization has finished.'),
+                'message': _('Website category changes were pushed back to the inventory categories.'),
                 'type': 'success',
                 'sticky': False,
             }
@@ -0,0 +1,143 @@
+from odoo import models, fields, api
+import logging
+import time
+from datetime import timedelta
+
+from .category_sync_run import SyncRunStats
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_TIME_LIMIT = 60 # seconds per cron run before handing over to the next one
+LOCK_RETRY_DELAY = 1 # minutes to wait when another synchronization holds the lock
+
+class CategorySyncJob(models.Model):
+    _name = 'category.sync.job'
+    _description = 'Background inventory to website category synchronization'
+    _order = 'id desc'
+
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='pending', required=True, readonly=True)
+    phase = fields.Selection([
+        ('categories', 'Categories'),
+        ('products', 'Products'),
+        ('done', 'Done'),
+    ], default='categories', required=True, readonly=True)
+    last_id = fields.Integer(readonly=True, help="Checkpoint: last category or product ID processed in the current phase.")
+    chunk_size = fields.Integer(default=DEFAULT_CHUNK_SIZE, required=True)
+    category_total = fields.Integer(readonly=True)
+    category_done = fields.Integer(readonly=True)
+    product_total = fields.Integer(readonly=True)
+    product_done = fields.Integer(readonly=True)
+    progress = fields.Float(compute='_compute_progress', help="Percentage of categories and products processed.")
+    date_start = fields.Datetime(readonly=True)
+    date_done = fields.Datetime(readonly=True)
+    error = fields.Text(readonly=True)
+    signature = fields.Char(readonly=True, help="Inventory tree signature stored as synced when the job is done, for automatic syncs.")
+    run_stats = fields.Json(readonly=True, help="Metrics summed over the chunks, recorded as a sync run when the job is done.")
+
+    @api.depends('category_total', 'category_done', 'product_total', 'product_done')
+    def _compute_progress(self):
+        for job in self:
+            total = job.category_total + job.product_total
+            job.progress = 100.0 * (job.category_done + job.product_done) / total if total else 0.0
+
+    @api.model
+    def enqueue(self, signature=False):
+        """Return the unfinished job, or create a new one, and wake up the cron."""
+        job = self.search([('state', 'in', ('pending', 'running'))], limit=1)
+        if not job:
+            job = self.create({
+                'signature': signature,
+                'category_total': self.env['product.category'].search_count([]),
+                'product_total': self.env['product.template'].search_count([('categ_id', '!=', False)]),
+            })
+        self.env.ref('website_category_sync.ir_cron_category_sync_job').sudo()._trigger()
+        return job
+
+    def _run_chunk(self):
+        """Process the next chunk of the current phase and move the checkpoint forward.
+
+        :return: False once the job is done
+        """
+        self.ensure_one()
+        Manager = self.env['category.sync.manager']
+        stats = SyncRunStats(self.env.cr)
+        stats.add_vals(self.run_stats)
+        if self.phase == 'categories':
+            if not self.last_id:
+                # First chunk: drop the mirrors of deleted inventory categories before syncing the others
+                with stats.phase('categories') as metrics:
+                    metrics['rows_written'] += Manager.prune_orphan_categories()
+            categories = self.env['product.category'].search([('id', '>', self.last_id)], order='id', limit=self.chunk_size)
+            if not categories:
+                self.write({'phase': 'products', 'last_id': 0})
+                return True
+            Manager._sync_partial(categories, self.env['product.template'], stats)
+            self.write({'last_id': categories[-1].id, 'category_done': self.category_done + len(categories), 'run_stats': stats.to_vals()})
+        elif self.phase == 'products':
+            products = self.env['product.template'].search(
+                [('categ_id', '!=', False), ('id', '>', self.last_id)], order='id', limit=self.chunk_size,
+            )
+            if not products:
+                self.write({'phase': 'done', 'state': 'done', 'date_done': fields.Datetime.now()})
+                self.env['category.sync.run']._record('full', stats)
+                if self.signature:
+                    self.env['ir.config_parameter'].sudo().set_param('website_category_sync.last_signature', self.signature)
+                return False
+            # The categories phase mirrored the whole tree: the cached maps cover every product
+            website_category_maps = list(Manager.get_website_category_maps().values())
+            with stats.phase('products') as metrics:
+                metrics['rows_read'] += len(products)
+                metrics['rows_written'] += Manager._bulk_assign_product_categories(products.ids, website_category_maps)
+            self.write({'last_id': products[-1].id, 'product_done': self.product_done + len(products), 'run_stats': stats.to_vals()})
+        return self.phase != 'done'
+
+    def _run(self, time_limit=DEFAULT_TIME_LIMIT):
+        """Run chunks until the job is done or the time budget is spent,
+        committing after each chunk so a crash resumes from the checkpoint."""
+        self.ensure_one()
+        if self.state == 'pending':
+            self.write({'state': 'running', 'date_start': fields.Datetime.now()})
+            self.env.cr.commit()
+        deadline = time.monotonic() + time_limit
+        while time.monotonic() < deadline:
+            if not self.env['category.sync.manager']._acquire_sync_lock(raise_exception=False):
+                # Retry later rather than waking the cron up again right away
+                _logger.info(f"Category sync job {self.id} waits for another synchronization to finish.")
+                self.env.ref('website_category_sync.ir_cron_category_sync_job')._trigger(
+                    at=fields.Datetime.now() + timedelta(minutes=LOCK_RETRY_DELAY))
+                return False
+            try:
+                more = self._run_chunk()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error(f"Category sync job {self.id} failed in phase '{self.phase}' after ID {self.last_id}: {e}", exc_info=True)
+                self.write({'state': 'failed', 'error': str(e)})
+                self.env.cr.commit()
+                return False
+            self.env.cr.commit()
+            if not more:
+                _logger.info(f"Category sync job {self.id} completed: {self.category_done} categories, {self.product_done} products.")
+                return False
+        return True
+
+    @api.model
+    def _cron_run_jobs(self):
+        job = self.search([('state', 'in', ('pending', 'running'))], order='id', limit=1)
+        if not job:
+            return
+        time_limit = int(self.env['ir.config_parameter'].sudo().get_param(
+            'website_category_sync.job_time_limit', DEFAULT_TIME_LIMIT))
+        if job._run(time_limit):
+            # Time budget spent: resume from the checkpoint in a new cron run.
+            self.env.ref('website_category_sync.ir_cron_category_sync_job')._trigger()
+
+    def action_retry(self):
+        self.filtered(lambda job: job.state == 'failed').write({'state': 'running', 'error': False})
+        self.env.ref('website_category_sync.ir_cron_category_sync_job').sudo()._trigger()
+        return True
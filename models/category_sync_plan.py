@@ -0,0 +1,97 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+import logging
+from datetime import timedelta
+
+from .category_sync_run import SyncRunStats
+
+_logger = logging.getLogger(__name__)
+
+DRAFT_PLAN_RETENTION_DAYS = 1
+
+class CategorySyncPlan(models.Model):
+    _name = 'category.sync.plan'
+    _description = 'Precomputed inventory to website category synchronization'
+    _order = 'id desc'
+
+    state = fields.Selection([
+        ('draft', 'Planned'),
+        ('applied', 'Applied'),
+    ], default='draft', required=True, readonly=True)
+    create_count = fields.Integer(string='Categories to Create', readonly=True)
+    rename_count = fields.Integer(string='Categories to Rename', readonly=True)
+    reparent_count = fields.Integer(string='Categories to Reparent', readonly=True)
+    product_count = fields.Integer(string='Products to Update', readonly=True)
+    plan_data = fields.Json(readonly=True, help="Change set computed by category.sync.manager.plan_sync().")
+    date_applied = fields.Datetime(readonly=True)
+
+    @api.depends('create_count', 'rename_count', 'reparent_count', 'product_count')
+    def _compute_display_name(self):
+        for plan in self:
+            plan.display_name = _("Plan #%(id)s: +%(create)s categories, %(products)s products",
+                id=plan.id, create=plan.create_count, products=plan.product_count)
+
+    def action_apply(self):
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_("This synchronization plan has already been applied."))
+        if any(len(group) != 3 for group in self.plan_data['products']):
+            raise UserError(_("This synchronization plan was computed by an older version. Plan the synchronization again."))
+        self.env['category.sync.manager']._acquire_sync_lock()
+        stats = SyncRunStats(self.env.cr)
+        self.env['category.sync.manager']._apply_plan_data(self.plan_data, stats, self.create_date)
+        self.env['category.sync.run']._record('plan', stats)
+        self.write({'state': 'applied', 'date_applied': fields.Datetime.now()})
+        _logger.info(f"Applied category sync plan {self.id}.")
+        return True
+
+    def _diff_csv_rows(self):
+        """Yield the plan as CSV rows: one per category change and one per product."""
+        data = self.plan_data
+        yield ['action', 'website_id', 'record', 'record_id', 'value']
+        for website_key, website_data in data['websites'].items():
+            website_id = int(website_key) or ''
+            for inv_id, name in website_data['create'].items():
+                yield ['create', website_id, 'product.category', inv_id, name]
+            for inv_id, name in website_data['rename'].items():
+                yield ['rename', website_id, 'product.category', inv_id, name]
+            for inv_id, parent_id in website_data['reparent'].items():
+                yield ['reparent', website_id, 'product.category', inv_id, parent_id or '']
+        def format_category(web_id):
+            # Negative IDs are website categories created by the plan, named after their inventory category
+            if web_id < 0:
+                return "new:%s/%s" % (data['new'][-web_id - 1][0] or '', data['new'][-web_id - 1][1])
+            return str(web_id)
+
+        for added, removed, product_ids in data['products']:
+            value = ' '.join(
+                ['+' + format_category(web_id) for web_id in added] + ['-' + format_category(web_id) for web_id in removed]
+            )
+            for product_id in product_ids:
+                yield ['assign', '', 'product.template', product_id, value]
+
+    @api.autovacuum
+    def _gc_draft_plans(self):
+        """Drop the plans never applied: they hold product IDs of the whole catalog."""
+        limit = fields.Datetime.now() - timedelta(days=DRAFT_PLAN_RETENTION_DAYS)
+        self.sudo().search([('state', '=', 'draft'), ('create_date', '<', limit)]).unlink()
+
+    def action_download_diff(self):
+        self.ensure_one()
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(self._diff_csv_rows())
+        attachment = self.env['ir.attachment'].create({
+            'name': f"category_sync_plan_{self.id}.csv",
+            'datas': base64.b64encode(buffer.getvalue().encode()),
+            'mimetype': 'text/csv',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{attachment.id}?download=true',
+            'target': 'self',
+        }
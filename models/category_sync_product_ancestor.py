@@ -0,0 +1,100 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+from odoo.tools.sql import table_exists
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class CategorySyncProductAncestor(models.Model):
+    _name = 'category.sync.product.ancestor'
+    _description = 'Website categories of a product and all their ancestors'
+    _auto = False
+    _log_access = False
+
+    product_tmpl_id = fields.Many2one('product.template', readonly=True)
+    public_categ_id = fields.Many2one('product.public.category', readonly=True)
+    depth = fields.Integer(readonly=True, help="Levels between the category and the closest one the product is assigned to; 0 when assigned directly.")
+
+    def init(self):
+        # A plain table rather than a view: it is refreshed incrementally by the sync engine.
+        exists = table_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            """
+            CREATE TABLE IF NOT EXISTS %(table)s (
+                id SERIAL PRIMARY KEY,
+                product_tmpl_id int4 NOT NULL REFERENCES product_template (id) ON DELETE CASCADE,
+                public_categ_id int4 NOT NULL REFERENCES product_public_category (id) ON DELETE CASCADE,
+                depth int4 NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS %(category_index)s ON %(table)s (public_categ_id, product_tmpl_id);
+            CREATE INDEX IF NOT EXISTS %(product_index)s ON %(table)s (product_tmpl_id);
+            """,
+            table=SQL.identifier(self._table),
+            category_index=SQL.identifier(f'{self._table}_category_product_index'),
+            product_index=SQL.identifier(f'{self._table}_product_tmpl_id_index'),
+        ))
+        if not exists:
+            self._refresh()
+
+    @api.model
+    def _refresh(self, product_ids=None):
+        """Rebuild the rows of `product_ids`, or of every product when None,
+        from the relation table and `parent_path` in two statements."""
+        if product_ids is not None and not product_ids:
+            return
+        ProductTemplate = self.env['product.template']
+        ProductTemplate.flush_model(['public_categ_ids'])
+        self.env['product.public.category'].flush_model(['parent_path'])
+        field = ProductTemplate._fields['public_categ_ids']
+        if product_ids is None:
+            delete_filter = insert_filter = SQL("TRUE")
+        else:
+            delete_filter = SQL("product_tmpl_id = ANY(%s)", list(product_ids))
+            insert_filter = SQL("rel.%s = ANY(%s)", SQL.identifier(field.column1), list(product_ids))
+        self.env.cr.execute(SQL(
+            "DELETE FROM %s WHERE %s RETURNING public_categ_id", SQL.identifier(self._table), delete_filter,
+        ))
+        category_ids = {row[0] for row in self.env.cr.fetchall()}
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(table)s (product_tmpl_id, public_categ_id, depth)
+            SELECT rel.%(product_column)s, ancestor.id::int4, MIN(ancestor.depth)
+              FROM %(relation)s rel
+              JOIN product_public_category category ON category.id = rel.%(category_column)s
+             CROSS JOIN LATERAL (
+                   SELECT chain.id, count(*) OVER () - chain.position AS depth
+                     FROM unnest(string_to_array(rtrim(category.parent_path, '/'), '/')) WITH ORDINALITY AS chain(id, position)
+                   ) AS ancestor
+             WHERE %(insert_filter)s
+          GROUP BY rel.%(product_column)s, ancestor.id
+         RETURNING public_categ_id
+            """,
+            table=SQL.identifier(self._table),
+            relation=SQL.identifier(field.relation),
+            product_column=SQL.identifier(field.column1),
+            category_column=SQL.identifier(field.column2),
+            insert_filter=insert_filter,
+        ))
+        inserted = self.env.cr.fetchall()
+        category_ids.update(row[0] for row in inserted)
+        _logger.info(f"Refreshed {len(inserted)} product ancestor category rows.")
+        self.invalidate_model()
+        if not self.env.context.get('category_sync_skip_counts'):
+            self.env['product.public.category']._update_product_counts(None if product_ids is None else category_ids)
+
+    @api.model
+    def _get_category_ids(self, product_ids):
+        """:return: the website categories holding `product_ids`, directly or through a descendant"""
+        self.env.cr.execute(SQL(
+            "SELECT DISTINCT public_categ_id FROM %s WHERE product_tmpl_id = ANY(%s)",
+            SQL.identifier(self._table), list(product_ids),
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _refresh_categories(self, category_ids):
+        """Rebuild the rows of the products below `category_ids`, after they moved in the tree."""
+        products = self.env['product.template'].with_context(active_test=False).search([
+            ('public_categ_ids', 'child_of', list(category_ids)),
+        ])
+        self._refresh(products.ids)
@@ -0,0 +1,77 @@
+from odoo import models, fields, api
+from contextlib import contextmanager
+import time
+
+SYNC_PHASES = ('categories', 'parents', 'products')
+PHASE_METRICS = ('duration', 'queries', 'rows_read', 'rows_written')
+
+class SyncRunStats:
+    """Collects wall time, SQL queries and rows read/written per phase of a sync run.
+
+    Phases can be entered several times; their metrics are summed.
+    """
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.phases = {phase: dict.fromkeys(PHASE_METRICS, 0) for phase in SYNC_PHASES}
+
+    @contextmanager
+    def phase(self, name):
+        metrics = self.phases[name]
+        start, queries = time.perf_counter(), self.cr.sql_log_count
+        try:
+            yield metrics
+        finally:
+            metrics['duration'] += time.perf_counter() - start
+            metrics['queries'] += self.cr.sql_log_count - queries
+
+    def add_vals(self, vals):
+        """Add the metrics of a `to_vals` dict, to carry them across transactions."""
+        for phase, metrics in self.phases.items():
+            for metric in metrics:
+                metrics[metric] += (vals or {}).get(f'{phase}_{metric}', 0)
+
+    def to_vals(self):
+        return {
+            f'{phase}_{metric}': value
+            for phase, metrics in self.phases.items()
+            for metric, value in metrics.items()
+        }
+
+class CategorySyncRun(models.Model):
+    _name = 'category.sync.run'
+    _description = 'History of inventory to website category synchronizations'
+    _order = 'id desc'
+
+    mode = fields.Selection([
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+        ('plan', 'Planned'),
+        ('subtree', 'Subtree'),
+        ('reverse', 'Website to Inventory'),
+    ], required=True, readonly=True)
+    duration = fields.Float(compute='_compute_totals', store=True, digits=(16, 3), help="Wall time of all phases, in seconds.")
+    queries = fields.Integer(compute='_compute_totals', store=True)
+
+    categories_duration = fields.Float(string='Create/Update Time', digits=(16, 3), readonly=True)
+    categories_queries = fields.Integer(string='Create/Update Queries', readonly=True)
+    categories_rows_read = fields.Integer(string='Create/Update Rows Read', readonly=True)
+    categories_rows_written = fields.Integer(string='Create/Update Rows Written', readonly=True)
+    parents_duration = fields.Float(string='Parent Assignment Time', digits=(16, 3), readonly=True)
+    parents_queries = fields.Integer(string='Parent Assignment Queries', readonly=True)
+    parents_rows_read = fields.Integer(string='Parent Assignment Rows Read', readonly=True)
+    parents_rows_written = fields.Integer(string='Parent Assignment Rows Written', readonly=True)
+    products_duration = fields.Float(string='Product Assignment Time', digits=(16, 3), readonly=True)
+    products_queries = fields.Integer(string='Product Assignment Queries', readonly=True)
+    products_rows_read = fields.Integer(string='Product Assignment Rows Read', readonly=True)
+    products_rows_written = fields.Integer(string='Product Assignment Rows Written', readonly=True)
+
+    @api.depends(*(f'{phase}_{metric}' for phase in SYNC_PHASES for metric in ('duration', 'queries')))
+    def _compute_totals(self):
+        for run in self:
+            run.duration = sum(run[f'{phase}_duration'] for phase in SYNC_PHASES)
+            run.queries = sum(run[f'{phase}_queries'] for phase in SYNC_PHASES)
+
+    @api.model
+    def _record(self, mode, stats):
+        return self.sudo().create(dict(stats.to_vals(), mode=mode))
@@ -0,0 +1,32 @@
+from odoo import models, api
+
+SYNCED_CATEGORY_FIELDS = ('name', 'parent_id')
+
+class ProductCategory(models.Model):
+    _inherit = 'product.category'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        categories = super().create(vals_list)
+        self.env['category.sync.manager']._queue_category_changes(categories)
+        return categories
+
+    def write(self, vals):
+        res = super().write(vals)
+        if any(field in vals for field in SYNCED_CATEGORY_FIELDS):
+            # A new parent changes the website hierarchy of every product below.
+            self.env['category.sync.manager']._queue_category_changes(self, subtree='parent_id' in vals)
+        return res
+
+    def unlink(self):
+        # Products lose (or change) their category: re-sync them once it is gone.
+        products = self.env['product.template'].with_context(active_test=False).search([
+            ('categ_id', 'child_of', self.ids),
+        ])
+        mirrored = self.env['product.public.category'].sudo().search_count([('inventory_category_id', 'child_of', self.ids)], limit=1)
+        res = super().unlink()
+        if mirrored:
+            # The database cleared inventory_category_id of the mirrors behind the ORM's back.
+            self.env.registry.clear_cache()
+        self.env['category.sync.manager']._queue_product_changes(products)
+        return res
@@ -0,0 +1,45 @@
+from odoo import api, fields, models
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    public_categ_ancestor_ids = fields.One2many(
+        'category.sync.product.ancestor', 'product_tmpl_id',
+        string='Website Categories and Ancestors',
+        help="Denormalized website categories of the product with all their ancestors, for shop filtering."
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        self.env['category.sync.manager']._queue_product_changes(products.filtered('categ_id'))
+        if any(vals.get('public_categ_ids') for vals in vals_list):
+            self.env['category.sync.product.ancestor']._refresh(products.ids)
+        return products
+
+    def write(self, vals):
+        res = super().write(vals)
+        Ancestor = self.env['category.sync.product.ancestor']
+        if 'categ_id' in vals:
+            self.env['category.sync.manager']._queue_product_changes(self)
+        if 'public_categ_ids' in vals:
+            Ancestor._refresh(self.ids)
+        elif vals.keys() & {'is_published', 'website_published', 'active'}:
+            self.env['product.public.category']._update_product_counts(Ancestor._get_category_ids(self.ids))
+        return res
+
+    def unlink(self):
+        category_ids = self.env['category.sync.product.ancestor']._get_category_ids(self.ids)
+        res = super().unlink()
+        self.env['product.public.category']._update_product_counts(category_ids)
+        return res
+
+    @api.model
+    def _search_get_detail(self, website, order, options):
+        category = options.get('category')
+        if not (category and str(category).isdigit()):
+            return super()._search_get_detail(website, order, options)
+        # Same lookup as the shop controller: the ancestors table instead of a `child_of` over the tree
+        detail = super()._search_get_detail(website, order, dict(options, category=None))
+        detail['base_domain'].append([('public_categ_ancestor_ids.public_categ_id', '=', int(category))])
+        return detail
@@ -1,9 +1,16 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from markupsafe import Markup
+import csv
+import gzip
+import io
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Tamaño de lote para las lecturas y escrituras masivas
+WRITE_CHUNK_SIZE = 1000
+
 class ProductSetNoTrackingWizard(models.TransientModel):
     _name = 'product.set.no.tracking.wizard'
     _description = 'Wizard to Set No Tracking on All Products'
@@ -27,6 +34,27 @@ class ProductSetNoTrackingWizard(models.TransientModel):
         help="Selecciona un producto que tenga el checkbox 'Rastrear inventario' desmarcado y que se vea correctamente"
     )
 
+    product_ids_compare = fields.Many2many(
+        'product.template',
+        string="Otros productos a comparar",
+        help="Productos adicionales que se comparan contra el producto MARCADO en la misma lectura"
+    )
+
+    include_computed_fields = fields.Boolean(
+        string="Incluir campos computados",
+        help="Calcula también los campos no almacenados. Puede ser lento en catálogos grandes"
+    )
+
+    diagnosis_result = fields.Html(
+        string="Resultado del diagnóstico",
+        readonly=True
+    )
+
+    generate_audit_file = fields.Boolean(
+        string="Generar archivo de auditoría",
+        help="Guarda el estado antes/después de cada producto en un CSV comprimido adjunto, en lugar de registrarlo en los logs"
+    )
+
     @api.depends('confirmation_text') # Dummy depends to trigger compute
     def _compute_confirmation_text(self):
         product_template_count_to_update = self.env['product.template'].search_count([
@@ -42,22 +70,17 @@ class ProductSetNoTrackingWizard(models.TransientModel):
     def action_confirm_set_no_tracking(self):
         _logger.info("Iniciando proceso para establecer 'Sin seguimiento' en todos los productos base aplicables.")
 
-        # Log para depuración
-        all_products_count = self.env['product.template'].search_count([])
-        _logger.info(f"Total de plantillas de producto en el sistema: {all_products_count}")
-        
-        products_to_change_count = self.env['product.template'].search_count([
-            ('tracking', '!=', 'none')
-        ])
-        _logger.info(f"Plantillas de producto que necesitan corrección: {products_to_change_count}")
-
-        # Logs adicionales para tipos de seguimiento específicos
-        products_with_lot_tracking = self.env['product.template'].search_count([('tracking', '=', 'lot')])
-        _logger.info(f"Plantillas de producto con tracking = 'lot': {products_with_lot_tracking}")
-        products_with_serial_tracking = self.env['product.template'].search_count([('tracking', '=', 'serial')])
-        _logger.info(f"Plantillas de producto con tracking = 'serial': {products_with_serial_tracking}")
+        # Conteos agregados en una sola consulta en lugar de un search_count por valor
+        ProductTemplate = self.env['product.template']
+        counts_by_tracking = dict(ProductTemplate._read_group([], ['tracking'], ['__count']))
+        all_products_count = sum(counts_by_tracking.values())
+        products_to_change_count = all_products_count - counts_by_tracking.get('none', 0)
+        _logger.info(
+            f"Plantillas de producto: total={all_products_count}, a corregir={products_to_change_count}, "
+            f"lot={counts_by_tracking.get('lot', 0)}, serial={counts_by_tracking.get('serial', 0)}"
+        )
 
-        product_templates_to_process = self.env['product.template'].search([
+        product_templates_to_process = ProductTemplate.search([
             ('tracking', '!=', 'none')
         ])
         
@@ -75,94 +98,101 @@ class ProductSetNoTrackingWizard(models.TransientModel):
             }
 
         ids_to_process = product_templates_to_process.ids
-        _logger.info(f"Se intentarán actualizar {len(ids_to_process)} plantillas de producto. IDs: {ids_to_process}")
+        _logger.info(f"Se intentarán actualizar {len(ids_to_process)} plantillas de producto.")
 
-        _logger.info("Estado ANTES de la escritura:")
-        for prod_template in product_templates_to_process:
-            _logger.info(f"  ID: {prod_template.id}, Nombre: {prod_template.name}")
-            _logger.info(f"    Tracking ANTES: {prod_template.tracking}")
-            _logger.info(f"    type ANTES: {prod_template.type}")
-            _logger.info(f"    is_storable ANTES: {prod_template.is_storable}")
+        # Estado ANTES solo si se pide el archivo de auditoría: tuplas compactas, leídas por lotes
+        state_before = self._read_tracking_state(ids_to_process) if self.generate_audit_file else None
 
-        updated_count = 0
-        not_updated_count = 0
-        
         try:
-            # Primero solo actualizar tracking, luego descubriremos los valores correctos para type
             values_to_update = {
                 'tracking': 'none'
             }
             product_templates_to_process.write(values_to_update)
-            _logger.info(f"Operación de escritura {values_to_update} ejecutada para IDs: {ids_to_process}.")
+            _logger.info(f"Operación de escritura {values_to_update} ejecutada para {len(ids_to_process)} plantillas.")
 
-            _logger.info("Estado DESPUÉS de la escritura (re-leyendo los mismos productos para verificación):")
-            
             self.env.invalidate_all() # Invalidar toda la caché del entorno.
 
-            re_fetched_products = self.env['product.template'].search([('id', 'in', ids_to_process)])
-
-            if not re_fetched_products and ids_to_process: # Check if ids_to_process was not empty
-                 _logger.warning(f"No se pudieron recuperar los productos después de la actualización para los IDs: {ids_to_process}. Esto es inesperado si se procesaron productos.")
-
-            # Crear un diccionario para facilitar la búsqueda de productos re-leídos
-            re_fetched_map = {p.id: p for p in re_fetched_products}
-
-            for original_prod_id in ids_to_process:
-                current_prod_state = re_fetched_map.get(original_prod_id)
-                original_prod_template = next((p for p in product_templates_to_process if p.id == original_prod_id), None) # Para nombre y estado anterior
-                
-                if current_prod_state:
-                    _logger.info(f"  ID: {current_prod_state.id}, Nombre: {current_prod_state.name}")
-                    _logger.info(f"    Tracking DESPUÉS: {current_prod_state.tracking}")
-                    _logger.info(f"    type DESPUÉS: {current_prod_state.type}")
-                    _logger.info(f"    is_storable DESPUÉS: {current_prod_state.is_storable}")
-                    
-                    if current_prod_state.tracking == 'none':
-                        updated_count += 1
-                    else:
-                        not_updated_count += 1
-                        _logger.warning(f"  FALLO AL ACTUALIZAR: ID: {current_prod_state.id}, Nombre: {current_prod_state.name}")
-                        _logger.warning(f"    Tracking: {current_prod_state.tracking} (esperado: 'none')")
-                else:
-                    # Esto no debería suceder si el producto no fue eliminado
-                    original_name = original_prod_template.name if original_prod_template else "Nombre Desconocido"
-                    original_tracking = original_prod_template.tracking if original_prod_template else "Tracking Desconocido"
-                    _logger.warning(f"  ID: {original_prod_id}, Nombre: {original_name} no encontrado después de la actualización. Tracking ANTES: {original_tracking}")
-                    not_updated_count += 1
-
+            # Verificación posterior con una sola consulta
+            not_updated_count = ProductTemplate.with_context(active_test=False).search_count([
+                ('id', 'in', ids_to_process), ('tracking', '!=', 'none'),
+            ])
+            missing_count = len(ids_to_process) - ProductTemplate.with_context(active_test=False).search_count([
+                ('id', 'in', ids_to_process),
+            ])
+            not_updated_count += missing_count
+            updated_count = len(ids_to_process) - not_updated_count
 
+            if missing_count:
+                _logger.warning(f"{missing_count} productos no se encontraron después de la actualización.")
             if not_updated_count > 0:
                  _logger.error(f"Resumen: {not_updated_count} de {len(ids_to_process)} productos NO se actualizaron correctamente a 'tracking: none'.")
-            elif updated_count > 0 : # Solo si hubo algo que procesar
+            else:
                  _logger.info(f"Resumen: Todos los {updated_count} productos procesados se actualizaron correctamente a 'tracking: none'.")
-            # Si updated_count es 0 y not_updated_count es 0, significa que ids_to_process estaba vacío, lo cual es manejado al inicio.
 
         except Exception as e:
-            _logger.error(f"Error al actualizar el seguimiento de productos: {e}. IDs que se intentaron procesar: {ids_to_process}", exc_info=True)
+            _logger.error(f"Error al actualizar el seguimiento de {len(ids_to_process)} productos: {e}", exc_info=True)
             raise UserError(_("Ocurrió un error al intentar actualizar las plantillas de producto: %s") % str(e))
 
+        audit_attachment = self._create_tracking_audit_attachment(ids_to_process, state_before) if state_before is not None else None
+
         # Mensaje de notificación final
-        if not ids_to_process: # Debería ser manejado por el chequeo inicial, pero por si acaso.
-            final_message = _('No había productos para procesar.')
-            final_type = 'info'
-        elif not_updated_count > 0:
+        if not_updated_count > 0:
             final_message = _('Se procesaron %s plantillas de producto. %s no pudieron ser actualizadas a "Sin seguimiento". Revisa los logs.') % (len(ids_to_process), not_updated_count)
             final_type = 'warning'
         else: # Todos actualizados exitosamente
             final_message = _('Operación completada. %s plantillas de producto fueron actualizadas exitosamente a "Sin seguimiento".') % updated_count
             final_type = 'success'
-            
+
+        params = {
+            'title': _('Resultado de la Operación'),
+            'message': final_message,
+            'sticky': True,
+            'type': final_type,
+        }
+        if audit_attachment:
+            params['message'] += ' %s'
+            params['links'] = [{
+                'label': _('Descargar auditoría'),
+                'url': f'/web/content/{audit_attachment.id}?download=true',
+            }]
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
-            'params': {
-                'title': _('Resultado de la Operación'),
-                'message': final_message,
-                'sticky': True, 
-                'type': final_type,
-            }
+            'params': params,
         }
 
+    def _read_tracking_state(self, product_ids):
+        """Lee tracking/is_storable por lotes y devuelve {id: (tracking, is_storable)}"""
+        state = {}
+        ProductTemplate = self.env['product.template'].with_context(active_test=False)
+        for start in range(0, len(product_ids), WRITE_CHUNK_SIZE):
+            chunk = ProductTemplate.browse(product_ids[start:start + WRITE_CHUNK_SIZE])
+            for row in chunk.read(['tracking', 'is_storable']):
+                state[row['id']] = (row['tracking'], row['is_storable'])
+            chunk.invalidate_recordset()
+        return state
+
+    def _create_tracking_audit_attachment(self, product_ids, state_before):
+        """Escribe el detalle antes/después por producto en un CSV comprimido, por lotes"""
+        buffer = io.BytesIO()
+        with gzip.open(buffer, 'wt', newline='', encoding='utf-8') as stream:
+            writer = csv.writer(stream)
+            writer.writerow(['id', 'name', 'type', 'tracking_before', 'is_storable_before', 'tracking_after', 'is_storable_after'])
+            ProductTemplate = self.env['product.template'].with_context(active_test=False)
+            for start in range(0, len(product_ids), WRITE_CHUNK_SIZE):
+                chunk = ProductTemplate.browse(product_ids[start:start + WRITE_CHUNK_SIZE]).exists()
+                for row in chunk.read(['name', 'type', 'tracking', 'is_storable']):
+                    tracking_before, is_storable_before = state_before.get(row['id'], (None, None))
+                    writer.writerow([row['id'], row['name'], row['type'], tracking_before, is_storable_before, row['tracking'], row['is_storable']])
+                chunk.invalidate_recordset()
+        attachment = self.env['ir.attachment'].create({
+            'name': f"auditoria_tracking_{fields.Datetime.now():%Y%m%d_%H%M%S}.csv.gz",
+            'raw': buffer.getvalue(),
+            'mimetype': 'application/gzip',
+        })
+        _logger.info(f"Auditoría de {len(product_ids)} productos guardada en el adjunto {attachment.id}.")
+        return attachment
+
     def action_discover_type_values(self):
         """Descubre los valores válidos para el campo type"""
         _logger.info("=== DESCUBRIMIENTO DE VALORES VÁLIDOS PARA 'type' ===")
@@ -208,19 +238,77 @@ class ProductSetNoTrackingWizard(models.TransientModel):
             }
         }
 
+    def _diff_products(self, reference, others, field_names=None, include_computed=False):
+        """Compara N productos contra uno de referencia con una sola lectura por lotes.
+
+        Solo se leen las columnas almacenadas (sin binarios) salvo que se pidan
+        campos concretos o `include_computed`, así no se disparan uno a uno los
+        cómputos costosos de campos no almacenados.
+
+        Devuelve {product_id: {campo: {'old': valor_referencia, 'new': valor}}}
+        """
+        model_fields = reference._fields
+        if field_names is None:
+            field_names = [
+                name for name, field in model_fields.items()
+                if field.type != 'binary' and (field.store or (include_computed and field.compute))
+            ]
+        else:
+            field_names = [name for name in field_names if name in model_fields]
+        # Los campos restringidos a otros grupos se omiten en lugar de fallar la lectura completa
+        field_names = [name for name in field_names if reference._has_field_access(model_fields[name], 'read')]
+
+        rows = {row['id']: row for row in (reference | others).read(field_names, load=None)}
+
+        def normalize(field_name, value):
+            # Los relacionales x2many se comparan como conjuntos de IDs
+            if model_fields[field_name].type in ('one2many', 'many2many'):
+                return sorted(value or [])
+            return value
+
+        reference_row = rows[reference.id]
+        diff = {}
+        for product in others:
+            row = rows[product.id]
+            diff[product.id] = {
+                field_name: {'old': reference_row[field_name], 'new': row[field_name]}
+                for field_name in field_names
+                if normalize(field_name, reference_row[field_name]) != normalize(field_name, row[field_name])
+            }
+        return diff
+
+    def _render_product_diff(self, reference, others, diff, suspect_fields):
+        """Convierte el diff estructurado en una tabla HTML para el asistente"""
+        names = dict(zip(others.ids, others.mapped('display_name')))
+        field_labels = {name: field.string for name, field in reference._fields.items()}
+        parts = []
+        for product_id, field_diff in diff.items():
+            parts.append(Markup("<h5>%s</h5>") % _("%(reference)s vs %(product)s: %(count)s diferencias",
+                reference=reference.display_name, product=names[product_id], count=len(field_diff)))
+            if not field_diff:
+                continue
+            rows = Markup('').join(
+                Markup("<tr><td>%s%s</td><td>%s</td><td>%s</td></tr>") % (
+                    Markup("🔍 ") if field_name in suspect_fields else '',
+                    f"{field_labels[field_name]} ({field_name})", values['old'], values['new'],
+                )
+                # Los campos sospechosos primero
+                for field_name, values in sorted(field_diff.items(), key=lambda item: (item[0] not in suspect_fields, item[0]))
+            )
+            parts.append(Markup(
+                "<table class='table table-sm'><thead><tr><th>%s</th><th>%s</th><th>%s</th></tr></thead><tbody>%s</tbody></table>"
+            ) % (_("Campo"), reference.display_name, names[product_id], rows))
+        return Markup('').join(parts)
+
     def action_diagnose_products(self):
-        """Compara dos productos para encontrar diferencias en sus campos"""
-        if not self.product_id_tracked or not self.product_id_not_tracked:
-            raise UserError(_("Debes seleccionar ambos productos para hacer la comparación."))
-        
-        if self.product_id_tracked.id == self.product_id_not_tracked.id:
+        """Compara productos contra el de referencia para encontrar diferencias en sus campos"""
+        if not self.product_id_tracked or not (self.product_id_not_tracked or self.product_ids_compare):
+            raise UserError(_("Debes seleccionar el producto de referencia y al menos otro producto para hacer la comparación."))
+
+        others = (self.product_id_not_tracked | self.product_ids_compare) - self.product_id_tracked
+        if not others:
             raise UserError(_("Debes seleccionar dos productos diferentes."))
-        
-        _logger.info(f"=== DIAGNÓSTICO DE PRODUCTOS ===")
-        _logger.info(f"Producto MARCADO: ID {self.product_id_tracked.id} - {self.product_id_tracked.name}")
-        _logger.info(f"Producto DESMARCADO: ID {self.product_id_not_tracked.id} - {self.product_id_not_tracked.name}")
-        _logger.info("=" * 50)
-        
+
         # Campos sospechosos de controlar el comportamiento del UI de tracking
         suspect_fields = [
             'tracking', 'type', 'product_type', 'is_product_variant', 
@@ -228,100 +316,33 @@ class ProductSetNoTrackingWizard(models.TransientModel):
             'has_configurable_attributes', 'attribute_line_ids',
             'product_variant_count', 'product_variant_ids'
         ]
-        
-        _logger.info("=== VERIFICACIÓN DE CAMPOS SOSPECHOSOS ===")
-        differences_found = False
-        
-        for field_name in suspect_fields:
-            try:
-                if hasattr(self.product_id_tracked, field_name):
-                    val_tracked = getattr(self.product_id_tracked, field_name)
-                    val_not_tracked = getattr(self.product_id_not_tracked, field_name)
-                    
-                    # Comparar valores
-                    if hasattr(val_tracked, 'ids') and hasattr(val_not_tracked, 'ids'):
-                        # Para campos relacionales
-                        if set(val_tracked.ids) != set(val_not_tracked.ids):
-                            _logger.info(f"🔍 DIFERENCIA EN {field_name}:")
-                            _logger.info(f"  MARCADO: {val_tracked} (IDs: {val_tracked.ids})")
-                            _logger.info(f"  DESMARCADO: {val_not_tracked} (IDs: {val_not_tracked.ids})")
-                            _logger.info("-" * 30)
-                            differences_found = True
-                    elif val_tracked != val_not_tracked:
-                        _logger.info(f"🔍 DIFERENCIA EN {field_name}:")
-                        _logger.info(f"  MARCADO: {val_tracked} (Tipo: {type(val_tracked).__name__})")
-                        _logger.info(f"  DESMARCADO: {val_not_tracked} (Tipo: {type(val_not_tracked).__name__})")
-                        _logger.info("-" * 30)
-                        differences_found = True
-                    else:
-                        _logger.info(f"✓ Campo {field_name} es igual en ambos productos: {val_tracked}")
-                else:
-                    _logger.warning(f"⚠️ Campo {field_name} no existe en product.template")
-            except Exception as e:
-                _logger.warning(f"Error al acceder al campo {field_name}: {e}")
-        
-        # Búsqueda completa de diferencias en TODOS los campos
-        _logger.info("=== BÚSQUEDA COMPLETA DE DIFERENCIAS ===")
-        all_fields = self.product_id_tracked._fields.keys()
-        other_differences = 0
-        
-        for field_name in all_fields:
-            if field_name in suspect_fields:
-                continue  # Ya lo verificamos arriba
-                
-            try:
-                val_tracked = getattr(self.product_id_tracked, field_name)
-                val_not_tracked = getattr(self.product_id_not_tracked, field_name)
-                
-                # Comparar valores
-                if hasattr(val_tracked, 'ids') and hasattr(val_not_tracked, 'ids'):
-                    if set(val_tracked.ids) != set(val_not_tracked.ids):
-                        _logger.info(f"📋 Diferencia en {field_name}: MARCADO={val_tracked.ids}, DESMARCADO={val_not_tracked.ids}")
-                        other_differences += 1
-                elif val_tracked != val_not_tracked:
-                    _logger.info(f"📋 Diferencia en {field_name}: MARCADO={val_tracked}, DESMARCADO={val_not_tracked}")
-                    other_differences += 1
-            except Exception as e:
-                _logger.warning(f"Error al acceder al campo {field_name}: {e}")
-        
-        _logger.info(f"Total de diferencias encontradas en campos no sospechosos: {other_differences}")
-        
-        # Verificación específica del campo tracking
-        _logger.info("=== VERIFICACIÓN ESPECÍFICA ===")
-        _logger.info(f"Campo 'tracking' - MARCADO: {self.product_id_tracked.tracking}")
-        _logger.info(f"Campo 'tracking' - DESMARCADO: {self.product_id_not_tracked.tracking}")
-        
-        # Verificación de campos computados relacionados
-        computed_fields = ['is_storable', 'type']
-        _logger.info("=== CAMPOS COMPUTADOS RELACIONADOS ===")
-        for field in computed_fields:
-            try:
-                if hasattr(self.product_id_tracked, field):
-                    val_tracked = getattr(self.product_id_tracked, field)
-                    val_not_tracked = getattr(self.product_id_not_tracked, field)
-                    _logger.info(f"Campo '{field}' - MARCADO: {val_tracked}, DESMARCADO: {val_not_tracked}")
-            except Exception as e:
-                _logger.warning(f"Error al verificar campo computado {field}: {e}")
-        
-        if not differences_found and other_differences == 0:
+
+        diff = self._diff_products(self.product_id_tracked, others, include_computed=self.include_computed_fields)
+        if not self.include_computed_fields:
+            # Los sospechosos no almacenados se calculan siempre: son pocos y relevantes
+            suspect_diff = self._diff_products(self.product_id_tracked, others, field_names=[
+                name for name in suspect_fields
+                if name in self.product_id_tracked._fields and not self.product_id_tracked._fields[name].store
+            ])
+            for product_id, field_diff in suspect_diff.items():
+                diff[product_id].update(field_diff)
+
+        total_diffs = sum(len(field_diff) for field_diff in diff.values())
+        _logger.info(
+            f"=== DIAGNÓSTICO DE PRODUCTOS === Referencia ID {self.product_id_tracked.id}, "
+            f"{len(others)} productos comparados, {total_diffs} diferencias en total."
+        )
+        self.diagnosis_result = self._render_product_diff(self.product_id_tracked, others, diff, suspect_fields)
+
+        if total_diffs == 0:
             _logger.warning("¡No se encontraron diferencias! Esto es inesperado.")
-            message = _("No se encontraron diferencias entre los productos seleccionados. Esto podría indicar que el problema no está en los campos del modelo product.template. Revisa los logs para más detalles.")
-            msg_type = 'warning'
-        else:
-            _logger.info("=== DIAGNÓSTICO COMPLETADO ===")
-            total_diffs = (1 if differences_found else 0) + other_differences
-            message = _("Diagnóstico completado. Se encontraron %s diferencias. Revisa los logs del servidor para ver todas las diferencias encontradas entre los productos.") % total_diffs
-            msg_type = 'success'
-        
+
         return {
-            'type': 'ir.actions.client',
-            'tag': 'display_notification',
-            'params': {
-                'title': _('Diagnóstico de Productos'),
-                'message': message,
-                'sticky': True,
-                'type': msg_type,
-            }
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
         }
 
     def action_fix_tracking_comprehensive(self):
@@ -403,28 +424,7 @@ class ProductSetNoTrackingWizard(models.TransientModel):
         
         # Analizar relación entre type e is_storable
         _logger.info("=== RELACIÓN ENTRE type E is_storable ===")
-        all_products = self.env['product.template'].search([])
-        type_storable_map = {}
-        
-        for product in all_products:
-            type_val = product.type
-            storable_val = product.is_storable
-            
-            if type_val not in type_storable_map:
-                type_storable_map[type_val] = {'storable': 0, 'non_storable': 0, 'examples': []}
-            
-            if storable_val:
-                type_storable_map[type_val]['storable'] += 1
-            else:
-                type_storable_map[type_val]['non_storable'] += 1
-            
-            # Guardar algunos ejemplos
-            if len(type_storable_map[type_val]['examples']) < 3:
-                type_storable_map[type_val]['examples'].append({
-                    'id': product.id,
-                    'name': product.name,
-                    'is_storable': storable_val
-                })
+        type_storable_map = self._aggregate_type_storable()
         
         for type_val, data in type_storable_map.items():
             _logger.info(f"Type '{type_val}':")
@@ -459,6 +459,77 @@ class ProductSetNoTrackingWizard(models.TransientModel):
             }
         }
 
+    def _sample_names(self, product_ids):
+        """Devuelve {id: nombre} para los IDs de ejemplo con una sola lectura"""
+        products = self.env['product.template'].with_context(active_test=False).browse(product_ids)
+        return {row['id']: row['name'] for row in products.read(['name'])}
+
+    def _aggregate_type_storable(self):
+        """Cuenta productos por (type, is_storable) con un GROUP BY, con hasta 3 IDs de ejemplo"""
+        self.env['product.template'].flush_model(['type', 'is_storable', 'active'])
+        self.env.cr.execute("""
+            SELECT type, is_storable, count(*), (array_agg(id ORDER BY id))[1:3]
+              FROM product_template
+             WHERE active
+          GROUP BY type, is_storable
+        """)
+        rows = self.env.cr.fetchall()
+        names = self._sample_names([pid for row in rows for pid in row[3]])
+        type_storable_map = {}
+        for type_val, storable_val, count, sample_ids in rows:
+            data = type_storable_map.setdefault(type_val, {'storable': 0, 'non_storable': 0, 'examples': []})
+            data['storable' if storable_val else 'non_storable'] += count
+            for pid in sample_ids:
+                if len(data['examples']) < 3:
+                    data['examples'].append({'id': pid, 'name': names.get(pid), 'is_storable': bool(storable_val)})
+        return type_storable_map
+
+    def _aggregate_is_storable_combinations(self):
+        """Agrupa los productos por los 9 campos que podrían afectar is_storable.
+
+        Devuelve {clave: {'storable_true', 'storable_false', 'examples_true', 'examples_false'}}
+        con la misma clave que el análisis original: (type, categ_id, sale_ok, purchase_ok,
+        active, líneas de atributos, variantes, tiene código, tiene código de barras).
+        """
+        self.env['product.template'].flush_model()
+        self.env['product.product'].flush_model(['barcode', 'active', 'product_tmpl_id'])
+        self.env['product.template.attribute.line'].flush_model(['active', 'product_tmpl_id'])
+        self.env.cr.execute("""
+            SELECT pt.type, pt.categ_id, pt.sale_ok, pt.purchase_ok, pt.active,
+                   COALESCE(al.line_count, 0),
+                   COALESCE(pv.variant_count, 0),
+                   COALESCE(pt.default_code, '') != '',
+                   -- El código de barras de la plantilla solo existe con una única variante
+                   COALESCE(pv.variant_count = 1 AND pv.has_barcode, FALSE),
+                   count(*) FILTER (WHERE pt.is_storable),
+                   count(*) FILTER (WHERE pt.is_storable IS NOT TRUE),
+                   (array_agg(pt.id ORDER BY pt.id) FILTER (WHERE pt.is_storable))[1:3],
+                   (array_agg(pt.id ORDER BY pt.id) FILTER (WHERE pt.is_storable IS NOT TRUE))[1:3]
+              FROM product_template pt
+         LEFT JOIN (SELECT product_tmpl_id, count(*) AS line_count
+                      FROM product_template_attribute_line
+                     WHERE active
+                  GROUP BY product_tmpl_id) al ON al.product_tmpl_id = pt.id
+         LEFT JOIN (SELECT product_tmpl_id, count(*) AS variant_count,
+                           bool_or(COALESCE(barcode, '') != '') AS has_barcode
+                      FROM product_product
+                     WHERE active
+                  GROUP BY product_tmpl_id) pv ON pv.product_tmpl_id = pt.id
+             WHERE pt.active
+          GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9
+        """)
+        rows = self.env.cr.fetchall()
+        names = self._sample_names([pid for row in rows for pid in (row[11] or []) + (row[12] or [])])
+        combinations = {}
+        for row in rows:
+            combinations[tuple(row[:9])] = {
+                'storable_true': row[9],
+                'storable_false': row[10],
+                'examples_true': [{'id': pid, 'name': (names.get(pid) or '')[:50]} for pid in row[11] or []],
+                'examples_false': [{'id': pid, 'name': (names.get(pid) or '')[:50]} for pid in row[12] or []],
+            }
+        return combinations
+
     def _compare_products_for_is_storable(self, storable_product, non_storable_product):
         """Compara dos productos para encontrar qué hace que is_storable sea diferente"""
         _logger.info(f"Comparando:")
@@ -474,21 +545,11 @@ class ProductSetNoTrackingWizard(models.TransientModel):
             'tracking', 'description', 'description_purchase', 'description_sale'
         ]
         
-        differences = []
-        for field_name in fields_to_check:
-            try:
-                if hasattr(storable_product, field_name):
-                    val1 = getattr(storable_product, field_name)
-                    val2 = getattr(non_storable_product, field_name)
-                    
-                    # Comparar valores
-                    if hasattr(val1, 'ids') and hasattr(val2, 'ids'):
-                        if set(val1.ids) != set(val2.ids):
-                            differences.append(f"{field_name}: STORABLE={val1} vs NON-STORABLE={val2}")
-                    elif val1 != val2:
-                        differences.append(f"{field_name}: STORABLE={val1} vs NON-STORABLE={val2}")
-            except Exception as e:
-                _logger.warning(f"Error comparando campo {field_name}: {e}")
+        field_diff = self._diff_products(storable_product, non_storable_product, field_names=fields_to_check)[non_storable_product.id]
+        differences = [
+            f"{field_name}: STORABLE={values['old']} vs NON-STORABLE={values['new']}"
+            for field_name, values in field_diff.items()
+        ]
         
         _logger.info("DIFERENCIAS ENCONTRADAS:")
         for diff in differences:
@@ -639,49 +700,11 @@ class ProductSetNoTrackingWizard(models.TransientModel):
         # 2. Buscar patrones en valores existentes del sistema
         _logger.info("=== ANÁLISIS DE PATRONES EN EL SISTEMA ===")
         
-        # Obtener todos los productos únicos por combinaciones de campos relacionados
-        all_products = self.env['product.template'].search([])
-        _logger.info(f"Total de productos en el sistema: {len(all_products)}")
-        
-        # Analizar todas las combinaciones posibles
-        combinations = {}
-        for product in all_products:
-            # Crear una clave con los campos que podrían afectar is_storable
-            key_fields = [
-                product.type,
-                product.categ_id.id if product.categ_id else None,
-                product.sale_ok,
-                product.purchase_ok,
-                product.active,
-                len(product.attribute_line_ids),
-                product.product_variant_count,
-                bool(product.default_code),
-                bool(product.barcode)
-            ]
-            key = tuple(key_fields)
-            
-            if key not in combinations:
-                combinations[key] = {
-                    'storable_true': 0,
-                    'storable_false': 0,
-                    'examples_true': [],
-                    'examples_false': []
-                }
-            
-            if product.is_storable:
-                combinations[key]['storable_true'] += 1
-                if len(combinations[key]['examples_true']) < 3:
-                    combinations[key]['examples_true'].append({
-                        'id': product.id, 
-                        'name': product.name[:50]
-                    })
-            else:
-                combinations[key]['storable_false'] += 1
-                if len(combinations[key]['examples_false']) < 3:
-                    combinations[key]['examples_false'].append({
-                        'id': product.id, 
-                        'name': product.name[:50]
-                    })
+        # Agregar por combinaciones de campos relacionados directamente en la base de datos:
+        # el coste depende del número de combinaciones, no del número de productos
+        combinations = self._aggregate_is_storable_combinations()
+        total_products = sum(data['storable_true'] + data['storable_false'] for data in combinations.values())
+        _logger.info(f"Total de productos en el sistema: {total_products} ({len(combinations)} combinaciones distintas)")
         
         # Reportar combinaciones que tienen ambos valores (True y False)
         _logger.info("=== COMBINACIONES CON AMBOS VALORES is_storable ===")
@@ -977,74 +1000,49 @@ class ProductSetNoTrackingWizard(models.TransientModel):
         """Aplica la solución completa: fuerza is_storable=True y establece tracking='none'"""
         _logger.info("=== APLICANDO SOLUCIÓN COMPLETA ===")
         
-        # Obtener TODOS los productos
-        all_products = self.env['product.template'].search([])
-        _logger.info(f"Total de productos encontrados: {len(all_products)}")
-        
+        # Particionar los productos por lo que necesitan con una sola consulta agrupada
+        groups = self.env['product.template']._read_group(
+            ['|', ('is_storable', '=', False), ('tracking', '!=', 'none')],
+            ['is_storable', 'tracking'],
+            ['id:array_agg'],
+        )
+
         # Contadores
         storable_fixed = 0
         tracking_fixed = 0
         total_errors = 0
-        
-        for product in all_products:
-            try:
-                needs_update = False
-                update_vals = {}
-                
-                # Verificar si necesita is_storable=True
-                if not product.is_storable:
-                    update_vals['is_storable'] = True
-                    needs_update = True
-                
-                # Verificar si necesita tracking='none'
-                if product.tracking != 'none':
-                    update_vals['tracking'] = 'none'
-                    needs_update = True
-                
-                if needs_update:
-                    _logger.info(f"Actualizando producto: {product.name} (ID: {product.id})")
-                    _logger.info(f"  Valores a cambiar: {update_vals}")
-                    
-                    # Aplicar cambios
-                    product.write(update_vals)
-                    
-                    # Contar las correcciones
-                    if 'is_storable' in update_vals:
-                        storable_fixed += 1
-                    if 'tracking' in update_vals:
-                        tracking_fixed += 1
-                        
-            except Exception as e:
-                total_errors += 1
-                _logger.error(f"Error actualizando producto {product.name}: {e}")
-        
-        # Si hubo errores con el método normal, intentar con SQL
-        if total_errors > 0:
-            _logger.warning(f"Hubo {total_errors} errores. Intentando con SQL directo...")
-            try:
-                # Forzar is_storable=True para todos
-                self.env.cr.execute(
-                    "UPDATE product_template SET is_storable = TRUE WHERE is_storable = FALSE"
-                )
-                affected_storable = self.env.cr.rowcount
-                
-                # Forzar tracking='none' para todos
-                self.env.cr.execute(
-                    "UPDATE product_template SET tracking = 'none' WHERE tracking != 'none'"
-                )
-                affected_tracking = self.env.cr.rowcount
-                
-                self.env.cr.commit()
-                
-                _logger.info(f"SQL: {affected_storable} productos actualizados para is_storable")
-                _logger.info(f"SQL: {affected_tracking} productos actualizados para tracking")
-                
-                storable_fixed += affected_storable
-                tracking_fixed += affected_tracking
-                
-            except Exception as sql_error:
-                _logger.error(f"Error con SQL: {sql_error}")
-        
+
+        ids_by_update = {}
+        for is_storable, tracking, product_ids in groups:
+            update_vals = {}
+            if not is_storable:
+                update_vals['is_storable'] = True
+            if tracking != 'none':
+                update_vals['tracking'] = 'none'
+            ids_by_update.setdefault(tuple(sorted(update_vals.items())), []).extend(product_ids)
+
+        for update_key, product_ids in ids_by_update.items():
+            update_vals = dict(update_key)
+            _logger.info(f"Actualizando {len(product_ids)} productos con valores: {update_vals}")
+            for start in range(0, len(product_ids), WRITE_CHUNK_SIZE):
+                chunk = self.env['product.template'].browse(product_ids[start:start + WRITE_CHUNK_SIZE])
+                try:
+                    # Un savepoint por lote: un lote fallido no anula los anteriores
+                    with self.env.cr.savepoint():
+                        chunk.write(update_vals)
+                except Exception as e:
+                    total_errors += len(chunk)
+                    _logger.error(f"Error actualizando un lote de {len(chunk)} productos (IDs {chunk.ids[0]}-{chunk.ids[-1]}): {e}")
+                    continue
+
+                # Contar las correcciones
+                if 'is_storable' in update_vals:
+                    storable_fixed += len(chunk)
+                if 'tracking' in update_vals:
+                    tracking_fixed += len(chunk)
+                # Liberar la caché del lote para mantener la memoria constante
+                chunk.invalidate_recordset()
+
         _logger.info(f"=== SOLUCIÓN COMPLETA APLICADA ===")
         _logger.info(f"Productos con is_storable corregido: {storable_fixed}")
         _logger.info(f"Productos con tracking corregido: {tracking_fixed}")
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_category_sync
+from . import test_sync_benchmark
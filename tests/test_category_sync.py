@@ -0,0 +1,104 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCategorySync(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True, category_sync_skip_queue=True))
+        cls.Manager = cls.env['category.sync.manager']
+        cls.root = cls.env['product.category'].create({'name': "Sync Root"})
+        cls.child = cls.env['product.category'].create({'name': "Sync Child", 'parent_id': cls.root.id})
+        cls.manual_category = cls.env['product.public.category'].create({'name': "Hand-picked"})
+        cls.product = cls.env['product.template'].create({
+            'name': "Synced Product",
+            'categ_id': cls.child.id,
+            'public_categ_ids': [(6, 0, cls.manual_category.ids)],
+        })
+
+    def _sync_tree(self):
+        maps = self.Manager._sync_category_tree([('id', 'in', (self.root | self.child).ids)])
+        return list(maps.values())
+
+    def test_bulk_assign_keeps_non_managed_categories(self):
+        maps = self._sync_tree()
+        mirrors = self.env['product.public.category'].search([('inventory_category_id', 'in', (self.root | self.child).ids)])
+
+        self.assertEqual(self.Manager._bulk_assign_product_categories(self.product.ids, maps), 1)
+        self.assertEqual(self.product.public_categ_ids, self.manual_category | mirrors)
+
+        # Moving the product drops the stale managed category only
+        self.product.categ_id = self.root
+        self.assertEqual(self.Manager._bulk_assign_product_categories(self.product.ids, maps), 1)
+        root_mirror = mirrors.filtered(lambda category: category.inventory_category_id == self.root)
+        self.assertEqual(self.product.public_categ_ids, self.manual_category | root_mirror)
+
+    def test_bulk_assign_is_idempotent(self):
+        maps = self._sync_tree()
+        self.Manager._bulk_assign_product_categories(self.product.ids, maps)
+        self.assertEqual(self.Manager._bulk_assign_product_categories(self.product.ids, maps), 0)
+
+    def _mirror(self, category):
+        return self.env['product.public.category'].search([('inventory_category_id', '=', category.id)])
+
+    def _backdate(self, records, hours):
+        self.env.flush_all()
+        self.env.cr.execute(
+            f"UPDATE {records._table} SET write_date = (now() AT TIME ZONE 'UTC') - interval '{int(hours)} hours' WHERE id = ANY(%s)",
+            [records.ids],
+        )
+        records.invalidate_recordset(['write_date'])
+
+    def test_prune_reattaches_valid_children(self):
+        Category = self.env['product.category']
+        middle = Category.create({'name': "Sync Middle", 'parent_id': self.root.id})
+        leaf = Category.create({'name': "Sync Leaf", 'parent_id': middle.id})
+        self.Manager._sync_category_tree()
+        self._backdate(self._mirror(self.root) | self._mirror(middle) | self._mirror(leaf), 2)
+
+        # The leaf moves up and its former parent is deleted before the next sync
+        leaf.parent_id = self.root
+        middle.unlink()
+        self._backdate(self.root | leaf, 1)
+
+        self.assertEqual(self.Manager.prune_orphan_categories(), 1)
+        self.Manager._sync_category_tree()
+        leaf_mirror, root_mirror = self._mirror(leaf), self._mirror(self.root)
+        self.assertEqual(leaf_mirror.parent_id, root_mirror)
+        self.assertEqual(leaf_mirror.parent_path, f"{root_mirror.parent_path}{leaf_mirror.id}/")
+
+    def test_order_reparents_root_first(self):
+        current_parents = {10: False, 20: False, 30: False, 40: 10}
+        ordered_groups, cycle_ids = self.Manager._order_reparents({30: 20, 20: 10, 40: False}, current_parents)
+        self.assertFalse(cycle_ids)
+        self.assertEqual(ordered_groups, [(False, [40]), (10, [20]), (20, [30])])
+
+    def test_order_reparents_skips_cycles(self):
+        # 1 and 2 would become each other's parent; 3 would end up below the cycle
+        ordered_groups, cycle_ids = self.Manager._order_reparents({1: 2, 2: 1, 3: 1, 4: False}, {1: False, 2: False, 3: False, 4: 3})
+        self.assertEqual(cycle_ids, {1, 2})
+        self.assertEqual(ordered_groups, [(False, [4])])
+
+    def test_partial_sync_rewrites_moved_subtrees(self):
+        Category = self.env['product.category']
+        other_root = Category.create({'name': "Sync Other Root"})
+        upper = Category.create({'name': "Sync Upper", 'parent_id': self.child.id})
+        lower = Category.create({'name': "Sync Lower", 'parent_id': upper.id})
+        bottom = Category.create({'name': "Sync Bottom", 'parent_id': lower.id})
+        categories = self.root | self.child | other_root | upper | lower | bottom
+        self.Manager._sync_category_tree([('id', 'in', categories.ids)])
+        self._backdate(self.env['product.public.category'].search([('inventory_category_id', 'in', categories.ids)]), 1)
+
+        # Both moved categories land under the same parent: `bottom` sits below the two of them
+        (upper | lower).parent_id = other_root
+        self.Manager._sync_category_tree([('id', 'in', categories.ids)])
+
+        other_mirror, upper_mirror, lower_mirror, bottom_mirror = (
+            self._mirror(category) for category in (other_root, upper, lower, bottom)
+        )
+        self.assertEqual(upper_mirror.parent_path, f"{other_mirror.id}/{upper_mirror.id}/")
+        self.assertEqual(lower_mirror.parent_path, f"{other_mirror.id}/{lower_mirror.id}/")
+        self.assertEqual(bottom_mirror.parent_path, f"{other_mirror.id}/{lower_mirror.id}/{bottom_mirror.id}/")
+        self.assertEqual(bottom_mirror.parent_id, lower_mirror)
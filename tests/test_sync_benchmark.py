@@ -0,0 +1,151 @@
+"""Benchmarks for the category sync and the tracking wizard on synthetic catalogs.
+
+Not part of the standard test run. Launch them against a local PostgreSQL with::
+
+    odoo-bin -d bench_db -i website_category_sync --test-tags wcs_benchmark --stop-after-init
+
+Sizes are configured through environment variables (comma separated):
+
+- ``WCS_BENCH_CATEGORIES``: category tree sizes (default ``1000``)
+- ``WCS_BENCH_SHAPES``: tree shapes, ``deep`` and/or ``wide`` (default both)
+- ``WCS_BENCH_PRODUCTS``: catalog sizes (default ``10000``)
+- ``WCS_BENCH_REPORT``: JSON lines report path (default ``bench_output.txt``)
+- ``WCS_BENCH_LABEL``: free label stored with each result, e.g. a commit hash
+"""
+import json
+import logging
+import os
+import time
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+# Depth of the generated tree for each shape
+TREE_SHAPES = {
+    'deep': 50,
+    'wide': 3,
+}
+CREATE_BATCH_SIZE = 1000
+
+
+def _env_sizes(name, default):
+    return [int(size) for size in os.environ.get(name, default).split(',') if size.strip()]
+
+
+@tagged('post_install', '-at_install', '-standard', 'wcs_benchmark')
+class TestSyncBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True, category_sync_skip_queue=True))
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        report_path = os.environ.get('WCS_BENCH_REPORT', 'bench_output.txt')
+        with open(report_path, 'a', encoding='utf-8') as report:
+            for result in cls.results:
+                report.write(json.dumps(result) + '\n')
+        _logger.info("Benchmark report with %s results written to %s", len(cls.results), report_path)
+        super().tearDownClass()
+
+    def _generate_category_tree(self, size, depth):
+        """Create `size` categories spread over `depth` levels, level by level in batches."""
+        Category = self.env['product.category']
+        width = max(size // depth, 1)
+        parents = Category.create([{'name': f"Bench Root {i}"} for i in range(min(width, size))])
+        categories = parents
+        while len(categories) < size:
+            count = min(width, size - len(categories))
+            level = Category.browse()
+            for start in range(0, count, CREATE_BATCH_SIZE):
+                level |= Category.create([{
+                    'name': f"Bench {len(categories) + i}",
+                    'parent_id': parents[i % len(parents)].id,
+                } for i in range(start, min(start + CREATE_BATCH_SIZE, count))])
+            categories |= level
+            parents = level
+        return categories
+
+    def _generate_catalog(self, size, categories):
+        ProductTemplate = self.env['product.template']
+        for start in range(0, size, CREATE_BATCH_SIZE):
+            ProductTemplate.create([{
+                'name': f"Bench Product {i}",
+                'categ_id': categories[i % len(categories)].id,
+                'is_storable': bool(i % 2),
+                'tracking': ('none', 'lot', 'serial')[i % 3] if i % 2 else 'none',
+            } for i in range(start, min(start + CREATE_BATCH_SIZE, size))])
+        self.env.flush_all()
+        self.env.invalidate_all()
+
+    def _measure(self, scenario, phase, func, *args, **kwargs):
+        """Run `func` and record its wall time and SQL query count."""
+        self.env.invalidate_all()
+        queries_before = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.env.flush_all()
+        wall_time = time.perf_counter() - start
+        self.results.append(dict(
+            scenario,
+            phase=phase,
+            wall_time=round(wall_time, 4),
+            queries=self.env.cr.sql_log_count - queries_before,
+            label=os.environ.get('WCS_BENCH_LABEL', ''),
+        ))
+        _logger.info("Benchmark %s / %s: %.3fs", scenario, phase, wall_time)
+        return result
+
+    def _scenarios(self):
+        for shape in os.environ.get('WCS_BENCH_SHAPES', 'deep,wide').split(','):
+            for category_count in _env_sizes('WCS_BENCH_CATEGORIES', '1000'):
+                for product_count in _env_sizes('WCS_BENCH_PRODUCTS', '10000'):
+                    yield {
+                        'shape': shape.strip(),
+                        'categories': category_count,
+                        'products': product_count,
+                    }
+
+    def _run_scenarios(self, benchmark):
+        for scenario in self._scenarios():
+            with self.subTest(**scenario), self.env.cr.savepoint() as savepoint:
+                categories = self._generate_category_tree(scenario['categories'], TREE_SHAPES[scenario['shape']])
+                self._generate_catalog(scenario['products'], categories)
+                benchmark(dict(scenario, benchmark=self._testMethodName))
+                savepoint.rollback()
+            self.env.invalidate_all()
+
+    def test_sync_categories_to_website(self):
+        Manager = self.env['category.sync.manager']
+
+        def benchmark(scenario):
+            # Initial sync, phase by phase
+            website_category_maps = self._measure(scenario, 'categories', Manager._sync_category_tree)
+            products = self.env['product.template'].search([('categ_id', '!=', False)])
+            self._measure(scenario, 'products', Manager._sync_product_categories, products, list(website_category_maps.values()))
+            for website_category_map in website_category_maps.values():
+                self.assertEqual(len(website_category_map), self.env['product.category'].search_count([]))
+            # Second run on an already synchronized catalog
+            self._measure(scenario, 'resync', Manager.sync_categories_to_website)
+
+        self._run_scenarios(benchmark)
+
+    def test_tracking_wizard(self):
+        def benchmark(scenario):
+            wizard = self.env['product.set.no.tracking.wizard'].create({})
+            self._measure(scenario, 'investigate_is_storable', wizard.action_investigate_is_storable)
+            self._measure(scenario, 'deep_is_storable_investigation', wizard.action_deep_is_storable_investigation)
+            products = self.env['product.template'].search([], limit=11)
+            wizard.write({
+                'product_id_tracked': products[0].id,
+                'product_ids_compare': [(6, 0, products[1:].ids)],
+            })
+            self._measure(scenario, 'diagnose_products', wizard.action_diagnose_products)
+            self._measure(scenario, 'confirm_set_no_tracking', wizard.action_confirm_set_no_tracking)
+            self._measure(scenario, 'apply_complete_solution', wizard.action_apply_complete_solution)
+            self.assertFalse(self.env['product.template'].search_count([('tracking', '!=', 'none')]))
+
+        self._run_scenarios(benchmark)